@@ -1,30 +1,74 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import pickle
 import numpy as np
-import pandas as pd
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
-import traceback
 from dotenv import load_dotenv
+from model_registry import ModelRegistry
+from lookup_table import LookupTable
+from pdf_jobs import PdfJobQueue
+from inventory import FLEET_PATH, Inventory, Unavailable, booking_interval
+from metrics import Metrics
+from chat_client import ChatClient, FakeChatModel
+from chat_intents import CATALOG_PATH, IntentRouter
+from features import (FeatureError, HOLIDAYS, row_features, feature_matrix,
+                      calendar_columns, columnar_features, columns_to_matrix,
+                      derive_columns)
 import google.generativeai as genai
 import json
-import re
-import PyPDF2
+import ast
+import base64
 import io
 import hashlib
-import os
+import csv
+import threading
+import time
+import queue
+import atexit
+import logging
+import random
+from collections import OrderedDict
+
+# Optional: Parquet export
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
 
 app = Flask(__name__)
 
 # Load environment variables
 load_dotenv()
 
+# Logging: per-request lines are sampled (LOG_SAMPLE_RATE), errors never are
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.01))
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s')
+log = logging.getLogger(__name__)
+
+
+def log_sampled(message, *args, level=logging.INFO):
+    """Log a per-request line for a LOG_SAMPLE_RATE share of calls"""
+    if random.random() < LOG_SAMPLE_RATE and log.isEnabledFor(level):
+        log.log(level, message, *args)
+
+
+# Per-route request metrics and stage timings, served at /api/metrics
+metrics = Metrics()
+metrics.install(app)
+
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if GEMINI_API_KEY:
+if os.getenv('CHAT_MODEL') == 'fake':
+    # Local stand-in for testing and benchmarks (see chat_client.py)
+    chat_model = FakeChatModel(float(os.getenv('FAKE_CHAT_DELAY_MS', 200)) / 1000)
+    print("🧪 Using the fake chat model")
+elif GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
     chat_model = genai.GenerativeModel("gemini-1.5-flash")
     print("✅ Gemini AI configured")
@@ -55,112 +99,206 @@ print("="*80)
 # LOAD ML MODELS
 # ============================================================================
 
-# ================= DAY MODEL =================
-try:
-    model_path = os.path.join('models', 'xgb_day_model.pkl')
+MODELS_DIR = 'models'
 
-    print(f"Loading day model from: {model_path}")
-    with open(model_path, 'rb') as f:
-        loaded_data = pickle.load(f)
+# 'auto' prefers native Booster files from models/manifest.json over pickles
+MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'auto')
 
-    if isinstance(loaded_data, dict):
-        day_model = loaded_data.get('model')
-        day_features = loaded_data.get('feature_names')
-    else:
-        day_model = loaded_data
-        day_features = None
+# Defer loading each model until its first prediction
+LAZY_MODEL_LOADING = os.getenv('LAZY_MODEL_LOADING', '0') == '1'
 
-    # ✅ SAFE: Wrap in try-catch to prevent crashes
-    try:
-        if hasattr(day_model, 'get_xgb_params'):
-            params = day_model.get_xgb_params()
-            # Remove GPU params if they exist
-            for key in ['gpu_id', 'tree_method', 'predictor']:
-                params.pop(key, None)
-            # Set CPU params
-            params['tree_method'] = 'hist'
-            params['predictor'] = 'cpu_predictor'
-            day_model.set_params(**params)
-    except Exception:
-        pass  # Silently ignore - model will work anyway
-
-    # Extract feature names
-    if hasattr(day_model, "feature_names_in_"):
-        day_features = list(day_model.feature_names_in_)
-    elif not day_features:
-        day_features = [
-            'season', 'yr', 'mnth', 'holiday', 'weekday',
-            'workingday', 'weathersit', 'temp', 'atemp', 'hum', 'windspeed'
-        ]
+# 'numpy' scores with trees compiled to NumPy arrays (tree_ensemble.py)
+# instead of XGBoost; lower latency for single rows and small batches
+INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'xgboost')
 
-    print("✅ Day model loaded successfully!")
-    print(f"📊 Day Features: {day_features}")
+# Seconds between model file checks (0 disables the watcher)
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 10))
 
-except Exception as e:
-    print(f"❌ Error loading day model: {e}")
-    traceback.print_exc()
-    day_model = None
-    day_features = None
+# Shared secret for the admin endpoints (unset disables them)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 
+model_registry = ModelRegistry(
+    MODELS_DIR, MODEL_FORMAT, watch_interval=MODEL_WATCH_INTERVAL,
+    on_swap=lambda: prediction_cache.clear(), engine=INFERENCE_ENGINE)
 
-# ================= HOUR MODEL =================
-try:
-    model_path = os.path.join('models', 'xgb_hour_model.pkl')
 
-    print(f"Loading hour model from: {model_path}")
-    with open(model_path, 'rb') as f:
-        loaded_data = pickle.load(f)
+def get_model(kind):
+    """Active 'day' or 'hour' model (None if it failed to load)"""
+    return model_registry.get(kind)
 
-    if isinstance(loaded_data, dict):
-        hour_model = loaded_data.get('model')
-        hour_features = loaded_data.get('feature_names')
-    else:
-        hour_model = loaded_data
-        hour_features = None
 
-    # ✅ SAFE: Wrap in try-catch to prevent crashes
-    try:
-        if hasattr(hour_model, 'get_xgb_params'):
-            params = hour_model.get_xgb_params()
-            # Remove GPU params if they exist
-            for key in ['gpu_id', 'tree_method', 'predictor']:
-                params.pop(key, None)
-            # Set CPU params
-            params['tree_method'] = 'hist'
-            params['predictor'] = 'cpu_predictor'
-            hour_model.set_params(**params)
-    except Exception:
-        pass  # Silently ignore - model will work anyway
-
-    # Extract feature names
-    if hasattr(hour_model, "feature_names_in_"):
-        hour_features = list(hour_model.feature_names_in_)
-    elif not hour_features:
-        hour_features = [
-            'season', 'yr', 'mnth', 'hr', 'holiday', 'weekday',
-            'workingday', 'weathersit', 'temp', 'atemp', 'hum', 'windspeed'
-        ]
+# ============================================================================
+# INFERENCE
+# ============================================================================
+
 
-    print("✅ Hour model loaded successfully!")
-    print(f"📊 Hour Features: {hour_features}")
+class PredictionCache:
+    """Thread-safe bounded LRU cache of predictions with an optional TTL"""
+
+    def __init__(self, maxsize=4096, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
 
-except Exception as e:
-    print(f"❌ Error loading hour model: {e}")
-    traceback.print_exc()
-    hour_model = None
-    hour_features = None
+
+prediction_cache = PredictionCache(
+    maxsize=int(os.getenv('PREDICTION_CACHE_SIZE', 4096)),
+    ttl=float(os.getenv('PREDICTION_CACHE_TTL', 0)) or None
+)
+
+# Serve single-row predictions from the grids built by
+# build_lookup_table.py (interpolated, see lookup_table.py)
+LOOKUP_TABLES = os.getenv('LOOKUP_TABLES', '0') == '1'
+
+# Largest measured p99 interpolation error, relative to the mean
+# prediction, for which a table is used (0.05 = 5%). With the default axes
+# the day table measures 4.5% and is used; the hour table measures 24.2%
+# and is rejected, so hour predictions stay on the model.
+LOOKUP_MAX_ERROR = float(os.getenv('LOOKUP_MAX_ERROR', 0.05))
+
+
+def load_lookup_tables():
+    """Built tables within the error bound, keyed by prediction type"""
+    tables = {}
+    if not LOOKUP_TABLES:
+        return tables
+    for kind in ('day', 'hour'):
+        table = LookupTable.load(kind, MODELS_DIR)
+        if table is None:
+            print(f"⚠️ No {kind} lookup table - run build_lookup_table.py")
+            continue
+        error = table.error.get('p99_relative', float('inf'))
+        if error > LOOKUP_MAX_ERROR:
+            print(f"⚠️ {kind.title()} lookup table not used: p99 error "
+                  f"{error:.1%} exceeds LOOKUP_MAX_ERROR {LOOKUP_MAX_ERROR:.1%}")
+            continue
+        tables[kind] = table
+        print(f"✅ {kind.title()} lookup table loaded ({table.grid.size:,} cells, "
+              f"p99 error {error:.1%})")
+    return tables
+
+
+lookup_tables = load_lookup_tables()
+
+
+def cached_predict(prediction_type, model, features):
+    """Single-row prediction through the lookup table or the LRU cache
+
+    A lookup table is only used while it was built for the active model
+    version and the inputs fall inside its grid. Otherwise the cache key is
+    the model version plus the encoded float32 feature row, so payloads
+    that map to the same features share one entry. Swapping in a new model
+    clears the cache.
+    """
+    table = lookup_tables.get(prediction_type)
+    if table is not None and table.model_sha256 == model.sha256:
+        prediction = table.predict(features)
+        if prediction is not None:
+            return prediction
+
+    row = model.encoder.encode(features)
+    key = (model.version, prediction_type, row.tobytes())
+    prediction = prediction_cache.get(key)
+    if prediction is None:
+        prediction = float(model.predict(row)[0])
+        prediction_cache.put(key, prediction)
+    return prediction
+
+
+if not LAZY_MODEL_LOADING:
+    # This may be a preloading gunicorn master, which must not predict:
+    # the INFERENCE_ENGINE=numpy check runs in post_fork or before the
+    # first prediction instead
+    model_registry.load_all(check_engine=False)
 
 
 # ============================================================================
 # DATABASE SETUP
 # ============================================================================
 
+DB_PATH = os.getenv('DATABASE_PATH', 'bikerental.db')
+
+# DB_POOL=0 falls back to one plain connection per call (no pragmas)
+DB_POOL = os.getenv('DB_POOL', '1') != '0'
+
+DB_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    f"PRAGMA cache_size=-{int(os.getenv('DB_CACHE_KB', 20000))}",
+    f"PRAGMA mmap_size={int(os.getenv('DB_MMAP_BYTES', 268435456))}",
+    f"PRAGMA busy_timeout={int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))}",
+    'PRAGMA temp_store=MEMORY',
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection that stays open for reuse by its thread
+
+    close() only rolls back an unfinished transaction, so existing
+    ``conn.close()`` calls hand the connection back instead of closing it.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def release(self):
+        super().close()
+
+
+_db_local = threading.local()
+
 
 def init_db():
     """Initialize SQLite database with user-specific tables"""
-    conn = sqlite3.connect('bikerental.db')
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
+    # WAL lets readers and the writer proceed concurrently (persistent)
+    if DB_POOL:
+        cursor.execute('PRAGMA journal_mode=WAL')
+
     # Predictions table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS predictions (
@@ -197,6 +335,7 @@ def init_db():
             file_hash TEXT NOT NULL,
             filename TEXT,
             extracted_data TEXT,
+            metadata TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(user_email, file_hash)
         )
@@ -210,240 +349,282 @@ def init_db():
     cursor.execute(
         'CREATE INDEX IF NOT EXISTS idx_pdf_hash ON pdf_uploads(file_hash)')
 
+    # Keyset pagination walks these in (created_at, id) order per user
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_bookings_user_created '
+        'ON bookings(user_email, created_at, id)')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_predictions_user_created '
+        'ON predictions(user_email, created_at, id)')
+
+    # Background PDF processing jobs
+    PdfJobQueue.create_table(cursor)
+
+    # Booking/cancellation log that keeps every worker's availability index current
+    Inventory.create_table(cursor)
+
+    migrate_prediction_inputs(conn)
+    migrate_pdf_uploads(conn)
+
     conn.commit()
     conn.close()
     print("✅ Database initialized!")
 
 
-init_db()
+# Typed copies of the scalar prediction inputs: (column, request key, type)
+PREDICTION_INPUT_COLUMNS = (
+    ('prediction_date', 'date', str),
+    ('hour', 'hour', int),
+    ('temperature', 'temperature', float),
+    ('humidity', 'humidity', float),
+    ('wind_speed', 'windSpeed', float),
+    ('season', 'season', str),
+    ('weather', 'weather', str),
+    ('is_holiday', 'isHoliday', bool),
+)
+PREDICTION_INPUT_SQL = {
+    str: 'TEXT', int: 'INTEGER', float: 'REAL', bool: 'INTEGER'
+}
+
+
+def prediction_input_values(data):
+    """Typed column values for a prediction payload (None when absent/invalid)"""
+    values = []
+    for _, key, cast in PREDICTION_INPUT_COLUMNS:
+        value = data.get(key)
+        try:
+            values.append(None if value is None else cast(value))
+        except (TypeError, ValueError):
+            values.append(None)
+    return values
 
 
-def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect('bikerental.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+def prediction_row(user_email, prediction_type, data, prediction):
+    """Row for the predictions table: JSON payload plus typed input columns"""
+    return (user_email, prediction_type, json.dumps(data), prediction,
+            *prediction_input_values(data))
 
 
-def get_file_hash(file_content):
-    """Generate unique hash for file content"""
-    return hashlib.md5(file_content).hexdigest()
+def migrate_prediction_inputs(conn):
+    """Schema v1: typed input columns and JSON input_data on predictions
 
-# ============================================================================
-# HELPER FUNCTIONS
-# ============================================================================
+    Rows written before v1 hold ``str(dict)``; they are parsed once with
+    ast.literal_eval (never eval) and rewritten.
+    """
+    cursor = conn.cursor()
+    if cursor.execute('PRAGMA user_version').fetchone()[0] >= 1:
+        return
 
+    existing = {row[1] for row in cursor.execute('PRAGMA table_info(predictions)')}
+    for column, _, cast in PREDICTION_INPUT_COLUMNS:
+        if column not in existing:
+            cursor.execute(
+                f'ALTER TABLE predictions ADD COLUMN {column} {PREDICTION_INPUT_SQL[cast]}')
 
-def calculate_features_from_frontend(data, prediction_type='day'):
-    """Calculate features from frontend data"""
-    try:
-        date_str = data.get('date', datetime.now().strftime('%Y-%m-%d'))
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+    updates = []
+    for row_id, input_data in cursor.execute(
+            'SELECT id, input_data FROM predictions').fetchall():
+        try:
+            data = ast.literal_eval(input_data) if input_data else {}
+        except (ValueError, SyntaxError):
+            try:
+                data = json.loads(input_data)
+            except ValueError:
+                data = {}
+        if not isinstance(data, dict):
+            data = {}
+        updates.append((json.dumps(data), *prediction_input_values(data), row_id))
+
+    if updates:
+        assignments = ', '.join(
+            f'{column} = ?' for column, _, _ in PREDICTION_INPUT_COLUMNS)
+        cursor.executemany(
+            f'UPDATE predictions SET input_data = ?, {assignments} WHERE id = ?',
+            updates)
+        print(f"✅ Migrated {len(updates)} prediction rows to typed inputs")
+
+    cursor.execute('PRAGMA user_version = 1')
+
+
+def migrate_pdf_uploads(conn):
+    """Schema v2: JSON extracted_data and a metadata column on pdf_uploads
+
+    The metadata column makes an upload reusable as an extraction cache
+    entry for the same file. Rows written before v2 hold ``str(dict)``
+    and no metadata; their data is rewritten as JSON, and the file is
+    parsed again the next time anyone uploads it.
+    """
+    cursor = conn.cursor()
+    if cursor.execute('PRAGMA user_version').fetchone()[0] >= 2:
+        return
 
-        year = date_obj.year
-        month = date_obj.month
-        weekday = date_obj.weekday()
+    existing = {row[1] for row in cursor.execute('PRAGMA table_info(pdf_uploads)')}
+    if 'metadata' not in existing:
+        cursor.execute('ALTER TABLE pdf_uploads ADD COLUMN metadata TEXT')
 
-        season_map = {
-            'spring': 1, 'summer': 2, 'fall': 3, 'autumn': 3, 'winter': 4
-        }
-        season = season_map.get(data.get('season', 'summer').lower(), 2)
+    updates = []
+    for row_id, extracted_data in cursor.execute(
+            'SELECT id, extracted_data FROM pdf_uploads WHERE metadata IS NULL').fetchall():
+        try:
+            json.loads(extracted_data or '')
+            continue
+        except ValueError:
+            pass
+        try:
+            data = ast.literal_eval(extracted_data) if extracted_data else None
+        except (ValueError, SyntaxError):
+            data = None
+        updates.append((json.dumps(data) if isinstance(data, dict) else None, row_id))
 
-        weather_map = {
-            'clear': 1, 'cloudy': 2, 'mist': 2, 'rainy': 3,
-            'light_rain': 3, 'heavy_rain': 4, 'storm': 4
-        }
-        weathersit = weather_map.get(data.get('weather', 'clear').lower(), 1)
-
-        temp_celsius = float(data.get('temperature', 20))
-        temp = (temp_celsius + 10) / 50
-
-        humidity = float(data.get('humidity', 50))
-        hum = humidity / 100
-
-        wind_speed = float(data.get('windSpeed', 10))
-        windspeed = wind_speed / 67
-
-        atemp = temp - (windspeed * 0.05)
-        yr = 1 if year >= 2012 else 0
-        holiday = 1 if data.get('isHoliday', False) else 0
-        workingday = 1 if (weekday not in [5, 6] and not holiday) else 0
-
-        features = {
-            'season': season,
-            'yr': yr,
-            'mnth': month,
-            'holiday': holiday,
-            'weekday': weekday,
-            'workingday': workingday,
-            'weathersit': weathersit,
-            'temp': temp,
-            'atemp': atemp,
-            'hum': hum,
-            'windspeed': windspeed
-        }
+    if updates:
+        cursor.executemany(
+            'UPDATE pdf_uploads SET extracted_data = ? WHERE id = ?', updates)
+        print(f"✅ Migrated {len(updates)} PDF uploads to JSON")
 
-        if prediction_type == 'hour':
-            hour = int(data.get('hour', 12))
-            features['hr'] = hour
+    cursor.execute('PRAGMA user_version = 2')
 
-        return features
 
-    except Exception as e:
-        print(f"Error calculating features: {e}")
-        traceback.print_exc()
-        return None
+init_db()
 
 
-def parse_pdf_for_prediction(text):
-    """Extract prediction-related data from PDF text"""
-    try:
-        text_lower = text.lower()
-
-        # Initialize with defaults
-        extracted_data = {
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'hour': 12,
-            'temperature': 25,
-            'humidity': 60,
-            'windSpeed': 15,
-            'season': 'summer',
-            'weather': 'clear',
-            'isHoliday': False,
-            'confidence': 'low',
-            'extracted_fields': []
-        }
+def get_db():
+    """Get this thread's pooled database connection
+
+    Connections are kept per thread (and per process, so forked workers
+    never share one) with the tuning pragmas applied once. The statement
+    cache keeps prepared statements for the repeated queries.
+    """
+    if not DB_POOL:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None or _db_local.pid != os.getpid():
+        conn = sqlite3.connect(
+            DB_PATH, factory=PooledConnection, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        _db_local.conn = conn
+        _db_local.pid = os.getpid()
+    return conn
 
-        confidence_score = 0
 
-        # Temperature extraction
-        temp_patterns = [
-            r'temperature[:\s]*(\d+\.?\d*)\s*[°cC]',
-            r'temp[:\s]*(\d+\.?\d*)\s*[°cC]',
-            r'(\d+\.?\d*)\s*[°cC]',
-            r'(\d+\.?\d*)\s*celsius',
-        ]
+class PredictionWriter:
+    """Write-behind queue for prediction history rows
 
-        for pattern in temp_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                temp = float(match.group(1))
-                if -10 <= temp <= 50:
-                    extracted_data['temperature'] = int(temp)
-                    extracted_data['extracted_fields'].append('temperature')
-                    confidence_score += 1
-                    break
+    Request handlers enqueue rows and return immediately. A background
+    thread drains the queue and inserts each batch of up to ``batch_size``
+    rows, or whatever arrived within ``interval_ms``, in one transaction.
+    """
 
-        # Humidity extraction
-        humidity_patterns = [
-            r'humidity[:\s]*(\d+\.?\d*)\s*%',
-            r'relative\s*humidity[:\s]*(\d+)',
-            r'rh[:\s]*(\d+)\s*%',
-        ]
+    INSERT_SQL = (
+        'INSERT INTO predictions (user_email, prediction_type, input_data, '
+        'prediction_value, '
+        + ', '.join(column for column, _, _ in PREDICTION_INPUT_COLUMNS)
+        + ') VALUES (' + ', '.join('?' * (4 + len(PREDICTION_INPUT_COLUMNS))) + ')'
+    )
 
-        for pattern in humidity_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                hum = float(match.group(1))
-                if 0 <= hum <= 100:
-                    extracted_data['humidity'] = int(hum)
-                    extracted_data['extracted_fields'].append('humidity')
-                    confidence_score += 1
+    def __init__(self, batch_size=100, interval_ms=200):
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def enqueue(self, row):
+        self._ensure_started()
+        self._queue.put(row)
+
+    def _ensure_started(self):
+        # The thread does not survive a fork, so start one per process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='prediction-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     break
-
-        # Wind speed extraction
-        wind_patterns = [
-            r'wind\s*speed[:\s]*(\d+\.?\d*)\s*(?:km/h|kmph|kph)',
-            r'wind[:\s]*(\d+\.?\d*)\s*(?:km/h|kmph|kph)',
-        ]
-
-        for pattern in wind_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                wind = float(match.group(1))
-                if 0 <= wind <= 200:
-                    extracted_data['windSpeed'] = int(wind)
-                    extracted_data['extracted_fields'].append('windSpeed')
-                    confidence_score += 1
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
                     break
+            self._write(batch)
 
-        # Date extraction
-        date_match = re.search(r'date[:\s]*(\d{4}-\d{2}-\d{2})', text_lower)
-        if date_match:
-            extracted_data['date'] = date_match.group(1)
-            extracted_data['extracted_fields'].append('date')
-            confidence_score += 1
-
-        # Hour extraction
-        hour_match = re.search(r'hour[:\s]*(\d{1,2})', text_lower)
-        if hour_match:
-            hour = int(hour_match.group(1))
-            if 0 <= hour <= 23:
-                extracted_data['hour'] = hour
-                extracted_data['extracted_fields'].append('hour')
-                confidence_score += 1
-
-        # Season detection
-        season_keywords = {
-            'spring': ['spring', 'march', 'april', 'may'],
-            'summer': ['summer', 'june', 'july', 'august'],
-            'fall': ['fall', 'autumn', 'september', 'october', 'november'],
-            'winter': ['winter', 'december', 'january', 'february']
+    def _write(self, batch):
+        try:
+            with metrics.stage('db_write'):
+                conn = get_db()
+                with conn:
+                    conn.executemany(self.INSERT_SQL, batch)
+                conn.close()
+            self.written += len(batch)
+        except Exception as db_error:
+            self.failed += len(batch)
+            log.error('Could not write %d predictions: %s', len(batch), db_error)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout=5.0):
+        """Block until every queued row is written; False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'written': self.written,
+            'failed': self.failed
         }
 
-        for season, keywords in season_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                extracted_data['season'] = season
-                extracted_data['extracted_fields'].append('season')
-                confidence_score += 0.5
-                break
-
-        # Weather conditions
-        weather_keywords = {
-            'clear': ['clear', 'sunny', 'bright'],
-            'cloudy': ['cloudy', 'overcast', 'clouds'],
-            'rainy': ['rain', 'rainy', 'drizzle'],
-            'heavy_rain': ['heavy rain', 'thunderstorm', 'storm']
-        }
 
-        for weather, keywords in weather_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                extracted_data['weather'] = weather
-                extracted_data['extracted_fields'].append('weather')
-                confidence_score += 1
-                break
-
-        # Holiday detection
-        if any(keyword in text_lower for keyword in ['holiday', 'festival']):
-            extracted_data['isHoliday'] = True
-            extracted_data['extracted_fields'].append('holiday')
-            confidence_score += 0.5
-
-        # Confidence scoring
-        if confidence_score >= 5:
-            extracted_data['confidence'] = 'high'
-        elif confidence_score >= 3:
-            extracted_data['confidence'] = 'medium'
-        else:
-            extracted_data['confidence'] = 'low'
+prediction_writer = PredictionWriter(
+    batch_size=int(os.getenv('PREDICTION_WRITE_BATCH', 100)),
+    interval_ms=float(os.getenv('PREDICTION_WRITE_INTERVAL_MS', 200))
+)
+atexit.register(prediction_writer.flush)
 
-        return extracted_data
 
-    except Exception as e:
-        print(f"❌ PDF parsing error: {e}")
-        traceback.print_exc()
-        return {
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'hour': 12,
-            'temperature': 25,
-            'humidity': 60,
-            'windSpeed': 15,
-            'season': 'summer',
-            'weather': 'clear',
-            'isHoliday': False,
-            'confidence': 'low',
-            'extracted_fields': []
-        }
+def get_file_hash(file_content):
+    """Generate unique hash for file content"""
+    return hashlib.md5(file_content).hexdigest()
+
+
+# PDF uploads are processed by a process pool (see pdf_jobs.py)
+PDF_MAX_BYTES = int(os.getenv('PDF_MAX_BYTES', 10 * 1024 * 1024))
+
+pdf_jobs = PdfJobQueue(
+    get_db,
+    workers=int(os.getenv('PDF_WORKERS', 2)),
+    max_pages=int(os.getenv('PDF_MAX_PAGES', 50)),
+    timeout=float(os.getenv('PDF_JOB_TIMEOUT', 30)),
+    observe=metrics.observe_stage
+)
+atexit.register(pdf_jobs.shutdown)
+
+# Fleet per city and bike type, and which bikes are booked when (see inventory.py)
+inventory = Inventory.load(get_db, os.getenv('FLEET_PATH', FLEET_PATH))
 
 # ============================================================================
 # PREDICTION ROUTES
@@ -458,50 +639,39 @@ def predict_day():
 
     try:
         data = request.json
-        print(f"\n📥 Received day prediction request: {data}")
 
+        day_model = get_model('day')
         if not day_model:
             return jsonify({
                 'success': False,
                 'error': 'Day model not loaded'
             }), 500
 
-        features = calculate_features_from_frontend(data, 'day')
-        if features is None:
-            return jsonify({
-                'success': False,
-                'error': 'Could not calculate features'
-            }), 400
-
-        feature_values = [features.get(f, 0) for f in day_features]
-        df = pd.DataFrame([feature_values], columns=day_features)
+        try:
+            with metrics.stage('feature_build'):
+                features = row_features(data, 'day')
+        except FeatureError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        prediction = day_model.predict(df)[0]
+        with metrics.stage('model_predict'):
+            prediction = cached_predict('day', day_model, features)
         prediction = max(0, int(prediction))
 
-        # Save to database
-        try:
-            user_email = data.get('user_email', 'anonymous')
-            conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO predictions (user_email, prediction_type, input_data, prediction_value) VALUES (?, ?, ?, ?)',
-                (user_email, 'day', str(data), prediction)
-            )
-            conn.commit()
-            conn.close()
-        except Exception as db_error:
-            print(f"⚠️ Database error: {db_error}")
+        # Save to database (written behind by the background writer)
+        user_email = data.get('user_email', 'anonymous')
+        prediction_writer.enqueue(
+            prediction_row(user_email, 'day', data, prediction))
+        log_sampled('day prediction for %s: %d', user_email, prediction)
 
         return jsonify({
             'success': True,
             'prediction': prediction,
-            'type': 'day'
+            'type': 'day',
+            'model_version': day_model.version
         })
 
     except Exception as e:
-        print(f"\n❌ Error: {str(e)}")
-        traceback.print_exc()
+        log.exception('Day prediction failed')
         return jsonify({'success': False, 'error': str(e)}), 400
 
 
@@ -513,52 +683,302 @@ def predict_hour():
 
     try:
         data = request.json
-        print(f"\n📥 Received hour prediction request: {data}")
 
+        hour_model = get_model('hour')
         if not hour_model:
             return jsonify({
                 'success': False,
                 'error': 'Hour model not loaded'
             }), 500
 
-        features = calculate_features_from_frontend(data, 'hour')
-        if features is None:
+        try:
+            with metrics.stage('feature_build'):
+                features = row_features(data, 'hour')
+        except FeatureError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        with metrics.stage('model_predict'):
+            prediction = cached_predict('hour', hour_model, features)
+        prediction = max(0, int(prediction))
+
+        # Save to database (written behind by the background writer)
+        user_email = data.get('user_email', 'anonymous')
+        prediction_writer.enqueue(
+            prediction_row(user_email, 'hour', data, prediction))
+        log_sampled('hour prediction for %s: %d', user_email, prediction)
+
+        return jsonify({
+            'success': True,
+            'prediction': prediction,
+            'type': 'hour',
+            'model_version': hour_model.version
+        })
+
+    except Exception as e:
+        log.exception('Hour prediction failed')
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 10000))
+
+
+@app.route('/api/predict/batch', methods=['POST', 'OPTIONS'])
+def predict_batch():
+    """Predict many day/hour scenarios with one model call per type
+
+    Accepts ``{"scenarios": [...]}`` (or a bare list), where each scenario is
+    a regular day/hour payload plus ``"type": "day" | "hour"``. Results are
+    returned in input order. Batch results are not written to the
+    prediction history.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        data = request.json
+        scenarios = data.get('scenarios') if isinstance(data, dict) else data
+
+        if not isinstance(scenarios, list) or not scenarios:
             return jsonify({
                 'success': False,
-                'error': 'Could not calculate features'
+                'error': 'scenarios must be a non-empty list'
             }), 400
 
-        feature_values = [features.get(f, 0) for f in hour_features]
-        df = pd.DataFrame([feature_values], columns=hour_features)
+        if len(scenarios) > MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'Batch too large (max {MAX_BATCH_SIZE} scenarios)'
+            }), 413
+
+        log_sampled('batch prediction: %d scenarios', len(scenarios))
+
+        results = [None] * len(scenarios)
+        groups = {'day': [], 'hour': []}
+        for i, scenario in enumerate(scenarios):
+            prediction_type = scenario.get('type', 'day') \
+                if isinstance(scenario, dict) else None
+            if prediction_type not in groups:
+                results[i] = {'success': False, 'error': 'Invalid scenario'}
+                continue
+            groups[prediction_type].append(i)
+
+        model_versions = {}
+        for prediction_type, indices in groups.items():
+            if not indices:
+                continue
+
+            model = get_model(prediction_type)
+            if not model:
+                for i in indices:
+                    results[i] = {
+                        'success': False,
+                        'error': f'{prediction_type.title()} model not loaded'
+                    }
+                continue
+
+            model_versions[prediction_type] = model.version
+            with metrics.stage('feature_build'):
+                matrix, valid = feature_matrix(
+                    [scenarios[i] for i in indices], model.features, prediction_type)
+
+            predictions = np.zeros(len(indices), dtype=np.int64)
+            if valid.any():
+                with metrics.stage('model_predict'):
+                    predictions[valid] = np.maximum(
+                        0, model.predict(matrix[valid]).astype(np.int64))
+
+            for k, i in enumerate(indices):
+                if valid[k]:
+                    results[i] = {
+                        'success': True,
+                        'prediction': int(predictions[k]),
+                        'type': prediction_type
+                    }
+                else:
+                    results[i] = {
+                        'success': False,
+                        'error': 'Could not calculate features'
+                    }
 
-        prediction = hour_model.predict(df)[0]
-        prediction = max(0, int(prediction))
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'predictions': results,
+            'model_versions': model_versions
+        })
+
+    except Exception as e:
+        log.exception('Batch prediction failed')
+        return jsonify({'success': False, 'error': str(e)}), 400
 
-        # Save to database
-        try:
-            user_email = data.get('user_email', 'anonymous')
-            conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO predictions (user_email, prediction_type, input_data, prediction_value) VALUES (?, ?, ?, ?)',
-                (user_email, 'hour', str(data), prediction)
-            )
-            conn.commit()
-            conn.close()
-        except Exception as db_error:
-            print(f"⚠️ Database error: {db_error}")
+
+MAX_FORECAST_DAYS = int(os.getenv('MAX_FORECAST_DAYS', 31))
+
+
+def expand_forecast_input(data, key, default, n_days):
+    """Expand a scalar, per-day or per-hour forecast input to one value per hour"""
+    value = data.get(key, default)
+    if isinstance(value, list):
+        if len(value) == n_days:
+            return np.repeat(np.array(value, dtype=object), 24)
+        if len(value) == n_days * 24:
+            return np.array(value, dtype=object)
+        raise ValueError(
+            f'{key} must have {n_days} (per day) or {n_days * 24} (per hour) values')
+    return np.full(n_days * 24, value, dtype=object)
+
+
+def expand_forecast_numbers(data, key, default, n_days):
+    """expand_forecast_input for a numeric input, as float64
+
+    Raises ValueError naming ``key`` for null or non-numeric values, which
+    would otherwise reach the model as NaN.
+    """
+    values = expand_forecast_input(data, key, default, n_days)
+    try:
+        values = values.astype(np.float64)
+    except (TypeError, ValueError):
+        values = None
+    if values is None or not np.isfinite(values).all():
+        raise ValueError(f'{key} must be a number or a list of numbers')
+    return values
+
+
+@app.route('/api/forecast/hourly', methods=['POST', 'OPTIONS'])
+def forecast_hourly():
+    """Hourly demand curve over a date range from one hour model call
+
+    Takes ``start_date`` and ``end_date`` (or ``days``) plus the usual
+    weather inputs. Each weather input may be a scalar, a list with one
+    value per day or a list with one value per hour of the range. Holidays
+    come from the calendar for ``city`` (plus any ``isHoliday`` flags).
+    Per-day totals are returned next to the day model's prediction for
+    that day.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        data = request.json or {}
+
+        hour_model = get_model('hour')
+        if not hour_model:
+            return jsonify({
+                'success': False,
+                'error': 'Hour model not loaded'
+            }), 500
+
+        start_str = data.get('start_date', datetime.now().strftime('%Y-%m-%d'))
+        start = np.datetime64(datetime.strptime(start_str, '%Y-%m-%d').date(), 'D')
+        if 'end_date' in data:
+            end = np.datetime64(
+                datetime.strptime(data['end_date'], '%Y-%m-%d').date(), 'D')
+        else:
+            end = start + int(data.get('days', 1)) - 1
+
+        n_days = int((end - start).astype(np.int64)) + 1
+        if n_days < 1 or n_days > MAX_FORECAST_DAYS:
+            return jsonify({
+                'success': False,
+                'error': f'Date range must cover 1 to {MAX_FORECAST_DAYS} days'
+            }), 400
+
+        # One row per hour; per-day inputs are broadcast over the 24 hours
+        days = np.arange(start, end + 1)
+        row_days = np.repeat(days, 24)
+        season = expand_forecast_input(data, 'season', 'summer', n_days)
+        weather = expand_forecast_input(data, 'weather', 'clear', n_days)
+        holiday = expand_forecast_input(data, 'isHoliday', False, n_days)
+        temp_celsius = expand_forecast_numbers(data, 'temperature', 20, n_days)
+        humidity = expand_forecast_numbers(data, 'humidity', 50, n_days)
+        wind_speed = expand_forecast_numbers(data, 'windSpeed', 10, n_days)
+
+        with metrics.stage('feature_build'):
+            columns = columnar_features(
+                row_days, season, weather, temp_celsius, humidity, wind_speed,
+                holiday, np.tile(np.arange(24, dtype=np.int64), n_days),
+                data.get('city'))
+            matrix = columns_to_matrix(columns, hour_model.features)
+
+        with metrics.stage('model_predict'):
+            hourly = np.maximum(
+                0, hour_model.predict(matrix).astype(np.int64))
+        hourly = hourly.reshape(n_days, 24)
+        totals = hourly.sum(axis=1)
+
+        # Day model on the daily aggregate of the same inputs, for comparison
+        model_versions = {'hour': hour_model.version}
+        day_predictions = [None] * n_days
+        day_model = get_model('day')
+        if day_model:
+            model_versions['day'] = day_model.version
+
+            def per_day(values):
+                return values.reshape(n_days, 24)
+
+            day_columns = derive_columns(
+                *calendar_columns(days), per_day(columns['season'])[:, 0],
+                np.array([np.bincount(w).argmax()
+                          for w in per_day(columns['weathersit'])]),
+                per_day(columns['holiday']).max(axis=1),
+                per_day(temp_celsius).mean(axis=1),
+                per_day(humidity).mean(axis=1),
+                per_day(wind_speed).mean(axis=1))
+            day_matrix = columns_to_matrix(day_columns, day_model.features)
+            with metrics.stage('model_predict'):
+                day_predictions = np.maximum(
+                    0, day_model.predict(day_matrix).astype(np.int64)).tolist()
 
         return jsonify({
             'success': True,
-            'prediction': prediction,
-            'type': 'hour'
+            'start_date': str(start),
+            'end_date': str(end),
+            'total': int(totals.sum()),
+            'model_versions': model_versions,
+            'days': [{
+                'date': str(days[d]),
+                'hourly': hourly[d].tolist(),
+                'total': int(totals[d]),
+                'day_model_prediction': day_predictions[d]
+            } for d in range(n_days)]
         })
 
     except Exception as e:
-        print(f"\n❌ Error: {str(e)}")
-        traceback.print_exc()
+        log.exception('Hourly forecast failed')
         return jsonify({'success': False, 'error': str(e)}), 400
 
+
+@app.route('/api/holidays', methods=['GET'])
+def list_holidays():
+    """Public holidays for ``city`` (national ones if omitted) between
+    ``start`` and ``end`` (YYYY-MM-DD; default: the next 365 days)"""
+    city = request.args.get('city')
+    if city and not HOLIDAYS.knows(city):
+        return jsonify({
+            'success': False,
+            'error': f"Unknown city, expected one of: {', '.join(HOLIDAYS.cities)}"
+        }), 400
+
+    try:
+        start = datetime.strptime(
+            request.args.get('start', datetime.now().strftime('%Y-%m-%d')),
+            '%Y-%m-%d').date()
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() \
+            if 'end' in request.args else start + timedelta(days=365)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+
+    return jsonify({
+        'success': True,
+        'city': city,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'holidays': [
+            {'date': day.isoformat(), 'name': name}
+            for day, name in HOLIDAYS.between(start, end, city)
+        ]
+    })
+
 # ============================================================================
 # PDF UPLOAD ENDPOINT
 # ============================================================================
@@ -566,10 +986,19 @@ def predict_hour():
 
 @app.route("/api/upload-pdf", methods=["POST", "OPTIONS"])
 def upload_pdf():
+    """Queue a PDF for extraction and return its job id (202)
+
+    The extraction runs in the PDF process pool; poll
+    ``/api/upload-pdf/<job_id>`` for the result. A file that has already
+    been extracted (for any user) is answered from the stored result (200).
+    """
     if request.method == 'OPTIONS':
         return '', 204
 
     try:
+        if request.content_length and request.content_length > PDF_MAX_BYTES + 64 * 1024:
+            return jsonify({'success': False, 'error': 'File too large'}), 413
+
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file uploaded'}), 400
 
@@ -577,72 +1006,157 @@ def upload_pdf():
         if file.filename == '' or not file.filename.endswith('.pdf'):
             return jsonify({'success': False, 'error': 'Invalid file'}), 400
 
-        print(f"\n📄 Processing PDF: {file.filename}")
+        file_content = file.read(PDF_MAX_BYTES + 1)
+        if len(file_content) > PDF_MAX_BYTES:
+            return jsonify({
+                'success': False,
+                'error': f'File too large (max {PDF_MAX_BYTES:,} bytes)'
+            }), 413
 
-        # Read file content
-        file_content = file.read()
         file_hash = get_file_hash(file_content)
         user_email = request.form.get('user_email', 'anonymous')
 
         # Check for duplicate
-        try:
-            conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT id, created_at FROM pdf_uploads WHERE user_email = ? AND file_hash = ?',
-                (user_email, file_hash)
-            )
-            existing = cursor.fetchone()
-
-            if existing:
-                conn.close()
-                return jsonify({
-                    'success': False,
-                    'duplicate': True,
-                    'message': f'This PDF was already uploaded on {existing[1]}'
-                }), 409
-        except Exception:
-            conn = get_db()
-
-        # Process PDF
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        text_content = ""
-        for page in pdf_reader.pages:
-            text_content += page.extract_text() + "\n"
-
-        extracted_data = parse_pdf_for_prediction(text_content)
+        conn = get_db()
+        existing = conn.execute(
+            'SELECT id, created_at FROM pdf_uploads WHERE user_email = ? AND file_hash = ?',
+            (user_email, file_hash)
+        ).fetchone()
+        conn.close()
+        if existing:
+            return jsonify({
+                'success': False,
+                'duplicate': True,
+                'message': f'This PDF was already uploaded on {existing[1]}'
+            }), 409
+
+        # Same file already extracted for someone else: no parsing needed
+        cached = pdf_jobs.cached_result(user_email, file.filename, file_hash)
+        if cached is not None:
+            log_sampled('PDF cache hit: %s', file.filename)
+            return jsonify({
+                'success': True,
+                'status': 'done',
+                'cached': True,
+                'filename': file.filename,
+                **cached
+            }), 200
 
-        # Save to database
-        try:
-            cursor.execute(
-                'INSERT INTO pdf_uploads (user_email, file_hash, filename, extracted_data) VALUES (?, ?, ?, ?)',
-                (user_email, file_hash, file.filename, str(extracted_data))
-            )
-            conn.commit()
-            conn.close()
-        except Exception as db_error:
-            print(f"⚠️ Database save error: {db_error}")
+        job_id = pdf_jobs.pending_job(user_email, file_hash) or \
+            pdf_jobs.submit(user_email, file.filename, file_hash, file_content)
+        log_sampled('PDF upload %s queued as job %s', file.filename, job_id)
 
         return jsonify({
             'success': True,
-            'extracted_data': extracted_data,
-            'metadata': {
-                'filename': file.filename,
-                'confidence': extracted_data['confidence'],
-                'extracted_fields': extracted_data['extracted_fields'],
-                'page_count': len(pdf_reader.pages)
-            }
-        })
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/api/upload-pdf/{job_id}'
+        }), 202
 
     except Exception as e:
-        print(f"❌ Error: {e}")
-        traceback.print_exc()
+        log.exception('PDF upload failed')
         return jsonify({'success': False, 'error': str(e)}), 500
 
+
+@app.route("/api/upload-pdf/<job_id>", methods=["GET"])
+def upload_pdf_status(job_id):
+    """Status of a PDF job; once done, the extracted data and metadata"""
+    job = pdf_jobs.status(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'success': False, **job}), 422
+    return jsonify({'success': True, **job}), 200 if job['status'] == 'done' else 202
+
 # ============================================================================
 # CHAT ENDPOINT
 # ============================================================================
 
+CHAT_PROMPT = """You are a helpful assistant for BikeRental AI.
+User question: {question}
+Provide a helpful, concise answer (2-3 sentences)."""
+
+# Model calls get a deadline and a concurrency cap; replies are cached
+# per normalized question (see chat_client.py)
+chat_client = ChatClient(
+    chat_model,
+    CHAT_PROMPT,
+    cache=PredictionCache(
+        maxsize=int(os.getenv('CHAT_CACHE_SIZE', 1024)),
+        ttl=float(os.getenv('CHAT_CACHE_TTL', 3600)) or None
+    ),
+    timeout=float(os.getenv('CHAT_TIMEOUT', 8)),
+    max_concurrency=int(os.getenv('CHAT_MAX_CONCURRENCY', 4)),
+    observe=metrics.observe_stage
+)
+
+
+CHAT_FALLBACK_REPLY = "I can help you:\n\n🚴 Book bikes\n💰 Check prices\n\nWhat would you like?"
+
+# Cities, bikes, prices and intent keywords live in data/chat_catalog.json
+# and are compiled once here (see chat_intents.py)
+chat_router = IntentRouter.load(os.getenv('CHAT_CATALOG_PATH', CATALOG_PATH))
+
+CHAT_REPLIES = {
+    'greeting': "👋 Hi! I can help you book bikes.\n\nTry:\n'book scooter in mumbai for 2 hours'",
+    'prices': "💰 **Bike Prices:**\n\n" + "\n".join(
+        f"{number}\ufe0f\u20e3 {bike} – ₹{price}/hr"
+        for number, (bike, price) in enumerate(chat_router.prices.items(), 1))
+}
+
+
+def local_chat_reply(data, user_message):
+    """Response body for the intents answered without the model, else None
+
+    Greetings, prices and bookings ("book scooter in pune for 2 hours");
+    a booking is saved before the reply is returned.
+    """
+    intent = chat_router.route(user_message)
+    if intent is None:
+        return None
+    if intent.name != 'booking':
+        reply = CHAT_REPLIES.get(intent.name)
+        return {"reply": reply} if reply else None
+
+    city, bike_type, duration = intent.city, intent.bike, intent.hours
+    total = chat_router.prices[bike_type] * duration
+
+    # Save booking, if a bike is free from now for the whole ride
+    now = datetime.now()
+    day, start_time = now.strftime('%Y-%m-%d'), now.strftime('%H:%M')
+    try:
+        user_email = data.get('user_email', 'anonymous')
+        with metrics.stage('db_write'):
+            conn = get_db()
+            try:
+                booking_id = inventory.book(conn, user_email, city, bike_type, duration,
+                                            day, start_time, total)
+            finally:
+                conn.close()
+    except Unavailable:
+        return {
+            "reply": f"😕 Sorry, no {bike_type} is free in {city} for the next {duration}h.\n\nTry another bike or a shorter ride."
+        }
+    except ValueError:
+        return {"reply": "⏱️ Please give the ride length in whole hours, e.g. 'for 2 hours'."}
+    except Exception as db_error:
+        log.error('Chat booking not saved: %s', db_error)
+        return {"reply": "Sorry, the booking could not be saved. Please try again."}
+
+    return {
+        "reply": f"✅ Booking Confirmed!\n\n🚴 {bike_type}\n📍 {city}\n⏱️ {duration}h\n💰 ₹{total}",
+        "action": "BOOK",
+        "booking": {
+            "id": booking_id,
+            "city": city,
+            "bikeType": bike_type,
+            "duration": duration,
+            "date": day,
+            "startTime": start_time,
+            "totalPrice": total
+        }
+    }
+
 
 @app.route("/api/chat", methods=["POST", "OPTIONS"])
 def chat():
@@ -656,93 +1170,210 @@ def chat():
         if not user_message:
             return jsonify({"reply": "Please type a message."})
 
-        user_lower = user_message.lower()
+        local = local_chat_reply(data, user_message)
+        if local is not None:
+            return jsonify(local)
 
-        # Simple greetings
-        if any(word in user_lower for word in ['hello', 'hi', 'hey']):
-            return jsonify({
-                "reply": "👋 Hi! I can help you book bikes.\n\nTry:\n'book scooter in mumbai for 2 hours'"
-            })
+        # Gemini fallback (cached, bounded in time and concurrency)
+        reply = chat_client.ask(user_message)
+        return jsonify({"reply": reply or CHAT_FALLBACK_REPLY})
 
-        # Prices
-        if any(word in user_lower for word in ['price', 'cost', 'rate']):
-            return jsonify({
-                "reply": "💰 **Bike Prices:**\n\n1️⃣ Scooter – ₹200/hr\n2️⃣ Sports Bike – ₹500/hr\n3️⃣ Cruiser – ₹700/hr"
-            })
-
-        # Booking logic
-        city_match = re.search(
-            r'\b(mumbai|delhi|bangalore|hyderabad|pune)\b', user_lower)
-        bike_match = re.search(
-            r'\b(scooter|sports? bike|cruiser)\b', user_lower)
-        duration_match = re.search(r'(\d+)\s*(?:hour|hr|h\b)', user_lower)
-
-        if city_match and bike_match and duration_match:
-            city = city_match.group(1).title()
-            bike_raw = bike_match.group(1).lower()
-            bike_type = 'Sports Bike' if 'sport' in bike_raw else 'Scooter' if 'scooter' in bike_raw else 'Cruiser'
-            duration = int(duration_match.group(1))
-
-            price_map = {"Scooter": 200, "Sports Bike": 500, "Cruiser": 700}
-            total = price_map[bike_type] * duration
-
-            # Save booking
-            try:
-                user_email = data.get('user_email', 'anonymous')
-                conn = get_db()
-                cursor = conn.cursor()
-                cursor.execute(
-                    'INSERT INTO bookings (user_email, city, bike_type, duration, date, start_time, total_price, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-                    (user_email, city, bike_type, duration, datetime.now().strftime('%Y-%m-%d'),
-                     datetime.now().strftime('%H:%M'), total, 'confirmed')
-                )
-                conn.commit()
-                booking_id = cursor.lastrowid
-                conn.close()
-            except Exception as db_error:
-                print(f"❌ Database error: {db_error}")
-                booking_id = None
+    except Exception:
+        log.exception('Chat request failed')
+        return jsonify({"reply": "Sorry, something went wrong."})
 
-            return jsonify({
-                "reply": f"✅ Booking Confirmed!\n\n🚴 {bike_type}\n📍 {city}\n⏱️ {duration}h\n💰 ₹{total}",
-                "action": "BOOK",
-                "booking": {
-                    "id": booking_id or int(datetime.now().timestamp() * 1000),
-                    "city": city,
-                    "bikeType": bike_type,
-                    "duration": duration,
-                    "date": datetime.now().strftime('%Y-%m-%d'),
-                    "startTime": datetime.now().strftime('%H:%M'),
-                    "totalPrice": total
-                }
-            })
-
-        # Gemini fallback
-        if chat_model:
-            try:
-                prompt = f"""You are a helpful assistant for BikeRental AI.
-                User question: {user_message}
-                Provide a helpful, concise answer (2-3 sentences)."""
 
-                response = chat_model.generate_content(prompt)
-                return jsonify({"reply": response.text.strip()})
-            except Exception as e:
-                print(f"⚠️ Gemini error: {e}")
+def sse_event(event, data):
+    """One Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
+
+@app.route("/api/chat/stream", methods=["POST", "OPTIONS"])
+def chat_stream():
+    """Chat over Server-Sent Events
+
+    Takes the /api/chat JSON body. POST only: a booking intent creates a
+    booking, which a GET must not do. Local intents and fallbacks arrive
+    as one ``reply`` event carrying the /api/chat response body; model
+    answers are relayed as ``token`` events (``{"text": ...}``) as the
+    model produces them. Every stream ends with a ``done`` event.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    data = request.get_json(silent=True)
+    message = data.get("message", "") if isinstance(data, dict) else None
+    if not isinstance(message, str):
         return jsonify({
-            "reply": "I can help you:\n\n🚴 Book bikes\n💰 Check prices\n\nWhat would you like?"
-        })
+            'success': False,
+            'error': 'Expected a JSON object with a string message'
+        }), 400
 
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        traceback.print_exc()
-        return jsonify({"reply": "Sorry, something went wrong."})
+    user_message = message.strip()
+    try:
+        local = local_chat_reply(data, user_message) if user_message \
+            else {"reply": "Please type a message."}
+    except Exception:
+        log.exception('Chat request failed')
+        local = {"reply": "Sorry, something went wrong."}
+
+    def events():
+        if local is not None:
+            yield sse_event('reply', local)
+        else:
+            streamed = False
+            for chunk in chat_client.stream(user_message):
+                streamed = True
+                yield sse_event('token', {'text': chunk})
+            if not streamed:
+                yield sse_event('reply', {"reply": CHAT_FALLBACK_REPLY})
+        yield sse_event('done', {})
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # no proxy buffering in front of the stream
+    })
 
 # ============================================================================
 # BOOKINGS ENDPOINTS
 # ============================================================================
 
 
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 1000))
+STREAM_FETCH_SIZE = 500
+
+# Optional list filters per table: query parameter -> column
+LIST_FILTERS = {
+    'bookings': {'city': 'city', 'bike_type': 'bike_type', 'status': 'status'},
+    'predictions': {'type': 'prediction_type'},
+}
+
+
+def encode_cursor(row):
+    """Opaque pagination cursor for the (created_at, id) of a row"""
+    raw = json.dumps([row['created_at'], row['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(value):
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(value.encode()))
+        return str(created_at), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor: {value}') from e
+
+
+def query_user_rows(conn, table, columns, user_email, args, limit=None):
+    """Newest-first rows of ``table`` for a user, keyset-paginated
+
+    ``args`` supplies the optional ``cursor`` and the LIST_FILTERS for the
+    table. Ordering is (created_at, id) descending so the composite
+    per-user indexes serve both the filter and the sort.
+    """
+    sql = f'SELECT {columns} FROM {table} WHERE user_email = ?'
+    params = [user_email]
+
+    for param, column in LIST_FILTERS[table].items():
+        if args.get(param):
+            sql += f' AND {column} = ?'
+            params.append(args[param])
+
+    if args.get('cursor'):
+        sql += ' AND (created_at, id) < (?, ?)'
+        params.extend(decode_cursor(args['cursor']))
+
+    sql += ' ORDER BY created_at DESC, id DESC'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit)
+
+    return conn.execute(sql, params)
+
+
+def page_limit(args, default):
+    """Page size from ``limit`` (None means unpaged)"""
+    if 'limit' not in args:
+        return default
+    return max(1, min(int(args['limit']), MAX_PAGE_SIZE))
+
+
+def list_response(conn, table, columns, user_email, to_dict, key, default_limit):
+    """JSON page (with ``next_cursor``) or, with ``format=ndjson``, a stream"""
+    args = request.args
+    limit = page_limit(args, default_limit)
+
+    if args.get('format') == 'ndjson':
+        rows = query_user_rows(conn, table, columns, user_email, args, limit)
+
+        def generate():
+            try:
+                while True:
+                    chunk = rows.fetchmany(STREAM_FETCH_SIZE)
+                    if not chunk:
+                        break
+                    yield ''.join(json.dumps(to_dict(row)) + '\n' for row in chunk)
+            finally:
+                conn.close()
+
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query_user_rows(
+        conn, table, columns, user_email, args,
+        None if limit is None else limit + 1).fetchall()
+    conn.close()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+
+    return jsonify({
+        'success': True,
+        key: [to_dict(row) for row in rows],
+        'next_cursor': next_cursor
+    })
+
+
+BOOKING_COLUMNS = ('id, city, bike_type, duration, date, start_time, '
+                   'total_price, status, created_at')
+
+BOOKING_FIELDS = ('user_email', 'city', 'bike_type', 'duration', 'date',
+                  'start_time', 'total_price')
+
+
+def booking_error(data):
+    """Why a POSTed booking payload cannot be stored, or None"""
+    if not isinstance(data, dict):
+        return 'Booking must be a JSON object'
+    missing = [field for field in BOOKING_FIELDS if data.get(field) is None]
+    if missing:
+        return f"Missing booking fields: {', '.join(missing)}"
+    if not all(isinstance(data.get(field, ''), str)
+               for field in ('user_email', 'city', 'bike_type', 'status')):
+        return 'user_email, city, bike_type and status must be strings'
+    if not isinstance(data['total_price'], (int, float, str)):
+        return 'total_price must be a number'
+    return None
+
+
+def booking_to_dict(row):
+    return {
+        'id': row['id'],
+        'city': row['city'],
+        'bike': row['bike_type'],
+        'bikeType': row['bike_type'],
+        'duration': row['duration'],
+        'date': row['date'],
+        'startTime': row['start_time'],
+        'totalPrice': row['total_price'],
+        'status': row['status'],
+        'createdAt': row['created_at'],
+        'station': f"{row['city']} Station"
+    }
+
+
 @app.route("/api/bookings", methods=["GET", "POST", "OPTIONS"])
 def bookings():
     if request.method == 'OPTIONS':
@@ -753,43 +1384,36 @@ def bookings():
         if not user_email:
             return jsonify({'success': False, 'error': 'User email required'}), 400
 
+        # Without ?limit= every booking is returned, as before
+        try:
+            return list_response(
+                get_db(), 'bookings', BOOKING_COLUMNS, user_email,
+                booking_to_dict, 'bookings', None)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor or limit'}), 400
+
+    # POST: only if a bike is free for the whole booking (see inventory.py)
+    data = request.get_json(silent=True)
+    error = booking_error(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    with metrics.stage('db_write'):
         conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT * FROM bookings WHERE user_email = ? ORDER BY created_at DESC',
-            (user_email,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
-
-        bookings_list = [{
-            'id': row[0],
-            'city': row[2],
-            'bike': row[3],
-            'bikeType': row[3],
-            'duration': row[4],
-            'date': row[5],
-            'startTime': row[6],
-            'totalPrice': row[7],
-            'status': row[8],
-            'createdAt': row[9],
-            'station': f"{row[2]} Station"
-        } for row in rows]
-
-        return jsonify({'success': True, 'bookings': bookings_list})
-
-    # POST
-    data = request.get_json()
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO bookings (user_email, city, bike_type, duration, date, start_time, total_price, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-        (data['user_email'], data['city'], data['bike_type'], data['duration'],
-         data['date'], data['start_time'], data['total_price'], data.get('status', 'confirmed'))
-    )
-    conn.commit()
-    booking_id = cursor.lastrowid
-    conn.close()
+        try:
+            booking_id = inventory.book(
+                conn, data['user_email'], data['city'], data['bike_type'], data['duration'],
+                data['date'], data['start_time'], data['total_price'],
+                data.get('status', 'confirmed'))
+        except Unavailable as e:
+            return jsonify({'success': False, 'error': str(e), 'available': e.free}), 409
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid date (YYYY-MM-DD), start_time (HH:MM) or duration'
+            }), 400
+        finally:
+            conn.close()
 
     return jsonify({'success': True, 'booking_id': booking_id})
 
@@ -800,18 +1424,78 @@ def delete_booking(booking_id):
         return '', 204
 
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM bookings WHERE id = ?', (booking_id,))
-    conn.commit()
-
-    if cursor.rowcount == 0:
+    try:
+        deleted = inventory.cancel(conn, booking_id)
+    finally:
         conn.close()
-        return jsonify({'success': False, 'error': 'Booking not found'}), 404
 
-    conn.close()
+    if not deleted:
+        return jsonify({'success': False, 'error': 'Booking not found'}), 404
     return jsonify({'success': True})
 
 
+@app.route("/api/availability", methods=["GET"])
+def availability():
+    """Free bikes in a city at ``date`` + ``start_time``
+
+    With ``duration`` (hours), the bikes free for that whole ride. Without
+    ``bike_type`` every tracked bike type of the city is listed. ``free``
+    and ``fleet`` are null for bike types the fleet file does not track.
+    """
+    city = request.args.get('city')
+    bike_type = request.args.get('bike_type')
+    day = request.args.get('date')
+    start_time = request.args.get('start_time')
+    duration = request.args.get('duration')
+    if not (city and day and start_time):
+        return jsonify({'success': False, 'error': 'city, date and start_time required'}), 400
+
+    try:
+        start, end = booking_interval(day, start_time, duration or 1)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid date (YYYY-MM-DD), start_time (HH:MM) or duration'
+        }), 400
+    if not duration:
+        end = None
+
+    bike_types = [bike_type] if bike_type else inventory.bike_types(city)
+    return jsonify({
+        'success': True,
+        'city': city,
+        'date': day,
+        'start_time': start_time,
+        'duration': float(duration) if duration else None,
+        'bikes': [{
+            'bike_type': bike,
+            'fleet': inventory.fleet_size(city, bike),
+            'free': inventory.free(city, bike, start, end)
+        } for bike in bike_types]
+    })
+
+
+PREDICTION_COLUMNS = (
+    'id, prediction_type, prediction_value, created_at, '
+    + ', '.join(column for column, _, _ in PREDICTION_INPUT_COLUMNS))
+
+
+def prediction_to_dict(row):
+    """History entry from a predictions row; inputs come from typed columns"""
+    prediction_input = {}
+    for column, key, cast in PREDICTION_INPUT_COLUMNS:
+        value = row[column]
+        if value is not None:
+            prediction_input[key] = bool(value) if cast is bool else value
+    return {
+        'id': row['id'],
+        'type': row['prediction_type'],
+        'value': row['prediction_value'],
+        'date': row['created_at'],
+        'input': prediction_input
+    }
+
+
 @app.route("/api/predictions", methods=["GET", "OPTIONS"])
 def get_predictions():
     if request.method == 'OPTIONS':
@@ -821,24 +1505,142 @@ def get_predictions():
     if not user_email:
         return jsonify({'success': False, 'error': 'User email required'}), 400
 
+    try:
+        return list_response(
+            get_db(), 'predictions', PREDICTION_COLUMNS, user_email,
+            prediction_to_dict, 'predictions', 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor or limit'}), 400
+
+# ============================================================================
+# EXPORT ENDPOINT
+# ============================================================================
+
+EXPORT_COLUMNS = {
+    'bookings': BOOKING_COLUMNS,
+    'predictions': PREDICTION_COLUMNS,
+}
+EXPORT_ROW_GROUP_SIZE = 10000
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each write batch"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_csv(rows, names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    while True:
+        chunk = rows.fetchmany(STREAM_FETCH_SIZE)
+        if not chunk:
+            break
+        writer.writerows(tuple(row) for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def arrow_schema(conn, table, names):
+    """Arrow schema for exported columns from their declared SQLite types"""
+    arrow_types = {'INTEGER': pa.int64(), 'REAL': pa.float64()}
+    declared = {row[1]: row[2].upper()
+                for row in conn.execute(f'PRAGMA table_info({table})')}
+    return pa.schema([
+        (name, arrow_types.get(declared.get(name), pa.string())) for name in names
+    ])
+
+
+def export_parquet(rows, schema):
+    # One row group per fetched chunk, drained to the client as it is written
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    while True:
+        chunk = rows.fetchmany(EXPORT_ROW_GROUP_SIZE)
+        if not chunk:
+            break
+        writer.write_table(
+            pa.Table.from_pylist([dict(row) for row in chunk], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+@app.route("/api/export", methods=["GET", "OPTIONS"])
+def export():
+    """Stream a user's bookings or predictions as CSV (or Parquet)
+
+    Query: ``user_email``, ``kind`` (bookings | predictions), ``format``
+    (csv | parquet) plus the same filters and cursor as the list endpoints.
+    Rows are read from SQLite in chunks, so memory stays bounded.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({'success': False, 'error': 'User email required'}), 400
+
+    kind = request.args.get('kind', 'bookings')
+    if kind not in EXPORT_COLUMNS:
+        return jsonify({'success': False, 'error': 'Invalid export kind'}), 400
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'parquet'):
+        return jsonify({'success': False, 'error': 'Invalid export format'}), 400
+    if export_format == 'parquet' and pa is None:
+        return jsonify({
+            'success': False,
+            'error': 'Parquet export requires pyarrow'
+        }), 501
+
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        'SELECT * FROM predictions WHERE user_email = ? ORDER BY created_at DESC LIMIT 100',
-        (user_email,)
-    )
-    rows = cursor.fetchall()
-    conn.close()
+    try:
+        rows = query_user_rows(
+            conn, kind, EXPORT_COLUMNS[kind], user_email, request.args)
+    except ValueError:
+        conn.close()
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+
+    names = [d[0] for d in rows.description]
 
-    predictions = [{
-        'id': row[0],
-        'type': row[2],
-        'value': row[4],
-        'date': row[5],
-        'input': eval(row[3]) if row[3] else {}
-    } for row in rows]
+    def generate():
+        try:
+            if export_format == 'csv':
+                yield from export_csv(rows, names)
+            else:
+                yield from export_parquet(rows, arrow_schema(conn, kind, names))
+        finally:
+            conn.close()
 
-    return jsonify({'success': True, 'predictions': predictions})
+    filename = f"{kind}.{export_format}"
+    return Response(
+        generate(),
+        mimetype='text/csv' if export_format == 'csv' else 'application/vnd.apache.parquet',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 # ============================================================================
 # HEALTH & ROOT
@@ -850,12 +1652,45 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'models': {
-            'day_model': day_model is not None,
-            'hour_model': hour_model is not None
-        }
+            'day_model': get_model('day') is not None,
+            'hour_model': get_model('hour') is not None
+        },
+        'model_version': model_registry.version,
+        'model_registry': model_registry.status(),
+        'prediction_cache': prediction_cache.stats(),
+        'lookup_tables': {
+            kind: {'model_version': table.model_sha256[:12], 'error': table.error}
+            for kind, table in lookup_tables.items()
+        },
+        'prediction_writer': prediction_writer.stats(),
+        'chat': chat_client.stats(),
+        'inventory': inventory.stats()
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Request and stage metrics of this worker, in Prometheus text format"""
+    return Response(metrics.render(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/admin/models/reload', methods=['POST'])
+def reload_models():
+    """Load changed model files, warm them up and swap them in
+
+    Requires ``X-Admin-Token`` matching ADMIN_TOKEN. Only this worker
+    reloads immediately; other workers pick the change up through their
+    file watcher. Pass ``?force=1`` to reload unchanged files too.
+    """
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+
+    result = model_registry.reload(force=request.args.get('force') == '1')
+    status = 500 if result.get('error') else 200
+    return jsonify({'success': status == 200, **result}), status
+
+
 @app.route('/', methods=['GET'])
 def index():
     return jsonify({
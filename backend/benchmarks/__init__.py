@@ -0,0 +1 @@
+"""Performance benchmarks for the backend (run from this directory)."""
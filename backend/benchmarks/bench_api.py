@@ -0,0 +1,427 @@
+"""
+Load test: throughput, latency and time to first byte per API endpoint.
+
+Replays a weighted, seeded mix of the frontend's traffic (day/hour
+predictions, bookings GET/POST, availability, chat, streamed chat and
+PDF uploads) from closed-loop client threads against either
+
+    inprocess  the Flask test client in this process (handler cost only)
+    gunicorn   a local gunicorn server over HTTP (--workers/--threads)
+
+Every run starts from a fresh temporary database seeded with bookings,
+and Gemini is replaced by the fake chat model (CHAT_MODEL=fake, with
+--gemini-ms of latency), so results are comparable between commits.
+The results are written as JSON, and --compare diffs two result files.
+
+Time to first byte (ttfb_*) is what a user waits for before anything
+shows up; the ``stream`` mix compares it for model answers over
+/api/chat (chat_model) and /api/chat/stream (chat_stream).
+
+Run from the backend directory:
+    python -m benchmarks.bench_api --mode gunicorn --output before.json
+    python -m benchmarks.bench_api --mode gunicorn --output after.json
+    python -m benchmarks.bench_api --compare before.json after.json
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.bench_pdf import make_pdf, make_report
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative request weights per endpoint
+MIXES = {
+    'default': {'predict_day': 35, 'predict_hour': 25, 'bookings_get': 15,
+                'bookings_post': 10, 'chat': 10, 'chat_stream': 5, 'pdf_upload': 5},
+    'predict': {'predict_day': 60, 'predict_hour': 40},
+    'bookings': {'bookings_get': 70, 'bookings_post': 20, 'availability': 10},
+    'chat': {'chat': 100},
+    'stream': {'chat_model': 50, 'chat_stream': 50},
+    'pdf': {'pdf_upload': 100}
+}
+
+USERS = [f'rider{n}@example.com' for n in range(20)]
+SEED_BOOKINGS_PER_USER = 10
+CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Pune']
+BIKES = {'Scooter': 200, 'Sports Bike': 500, 'Cruiser': 700}
+
+# Roughly half of the chat messages fall through to the model; a quarter
+# of those are unique questions that miss the reply cache. chat_model and
+# chat_stream only send unique questions, so every one reaches the model.
+CHAT_MESSAGES = [
+    'hello', 'what are your prices?', 'book scooter in pune for 2 hours',
+    'book cruiser in mumbai for 3 hours', 'Can I carry luggage on a cruiser?',
+    'Do you rent helmets too?', 'Is parking free near the station?',
+    'What documents do I need to rent a bike?'
+]
+
+# 409 is a booking for a fully booked slot: an answer, not a failure
+OK_STATUS = (200, 201, 202, 409)
+
+
+def prediction_payload(rng, hourly):
+    payload = {
+        'user_email': rng.choice(USERS),
+        'date': (date(2024, 1, 1) + timedelta(days=rng.randrange(730))).isoformat(),
+        'temperature': rng.randrange(-5, 45),
+        'humidity': rng.randrange(10, 100),
+        'windSpeed': rng.randrange(0, 50),
+        'season': rng.choice(['spring', 'summer', 'fall', 'winter']),
+        'weather': rng.choice(['clear', 'cloudy', 'rainy', 'storm']),
+        'isHoliday': rng.random() < 0.05,
+        'city': rng.choice(CITIES)
+    }
+    if hourly:
+        payload['hour'] = rng.randrange(24)
+    return payload
+
+
+def booking_payload(rng, user=None):
+    bike = rng.choice(list(BIKES))
+    duration = rng.randrange(1, 6)
+    return {
+        'user_email': user or rng.choice(USERS),
+        'city': rng.choice(CITIES),
+        'bike_type': bike,
+        'duration': duration,
+        'date': (date(2026, 1, 1) + timedelta(days=rng.randrange(365))).isoformat(),
+        'start_time': f'{rng.randrange(6, 22):02d}:00',
+        'total_price': BIKES[bike] * duration
+    }
+
+
+def make_request(endpoint, rng):
+    """(method, path, json, form) for one request to ``endpoint``"""
+    if endpoint == 'predict_day':
+        return 'POST', '/api/predict/day', prediction_payload(rng, False), None
+    if endpoint == 'predict_hour':
+        return 'POST', '/api/predict/hour', prediction_payload(rng, True), None
+    if endpoint == 'bookings_get':
+        return 'GET', f'/api/bookings?user_email={rng.choice(USERS)}', None, None
+    if endpoint == 'bookings_post':
+        return 'POST', '/api/bookings', booking_payload(rng), None
+    if endpoint == 'availability':
+        booking = booking_payload(rng)
+        return 'GET', (f"/api/availability?city={booking['city']}&date={booking['date']}"
+                       f"&start_time={booking['start_time']}&duration={booking['duration']}"), None, None
+    if endpoint in ('chat', 'chat_model', 'chat_stream'):
+        message = rng.choice(CHAT_MESSAGES)
+        if endpoint != 'chat' or rng.random() < 0.125:
+            message = f'Is there a bike station near landmark {rng.randrange(10 ** 9)}?'
+        path = '/api/chat/stream' if endpoint == 'chat_stream' else '/api/chat'
+        return 'POST', path, {
+            'message': message, 'user_email': rng.choice(USERS)
+        }, None
+    if endpoint == 'pdf_upload':
+        # A unique file every time, so each upload is really parsed
+        pages = make_report(rng.randrange(1, 4), complete=rng.random() < 0.5,
+                            seed=rng.randrange(1 << 30))
+        pages[-1].append(f'Report id {uuid.UUID(int=rng.getrandbits(128))}')
+        return 'POST', '/api/upload-pdf', None, {
+            'user_email': rng.choice(USERS), 'file': ('report.pdf', make_pdf(pages))
+        }
+    raise ValueError(f'Unknown endpoint {endpoint}')
+
+
+class InProcessClient:
+    """Flask test client speaking the same request tuples"""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def send(self, method, path, json_body=None, form=None):
+        """(status, seconds to the first body byte)"""
+        start = time.perf_counter()
+        kwargs = {'buffered': False}
+        if json_body is not None:
+            kwargs['json'] = json_body
+        elif form is not None:
+            kwargs['content_type'] = 'multipart/form-data'
+            kwargs['data'] = {
+                key: (io.BytesIO(value[1]), value[0]) if isinstance(value, tuple) else value
+                for key, value in form.items()
+            }
+        response = self.client.open(path, method=method, **kwargs)
+        chunks = response.iter_encoded()
+        next(chunks, None)
+        ttfb = time.perf_counter() - start
+        for _ in chunks:
+            pass
+        response.close()
+        return response.status_code, ttfb
+
+
+def encode_multipart(form):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for key, value in form.items():
+        if isinstance(value, tuple):
+            filename, content = value
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"; '
+                f'filename="{filename}"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+                + content + b'\r\n')
+        else:
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"'
+                f'\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class HttpClient:
+    """Keep-alive HTTP client for one load thread"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.conn = http.client.HTTPConnection(host, port, timeout=60)
+
+    def send(self, method, path, json_body=None, form=None):
+        """(status, seconds to the first body byte); status 0 on failure"""
+        start = time.perf_counter()
+        headers, body = {}, None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            body, headers['Content-Type'] = encode_multipart(form)
+        try:
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+            response.read(1)
+            ttfb = time.perf_counter() - start
+            response.read()
+            return response.status, ttfb
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            return 0, time.perf_counter() - start
+
+
+def seed_database(client, seed):
+    rng = random.Random(seed)
+    for user in USERS:
+        for _ in range(SEED_BOOKINGS_PER_USER):
+            client.send('POST', '/api/bookings', booking_payload(rng, user))
+
+
+def run_load(make_client, mix, concurrency, duration, warmup, seed):
+    """Closed-loop load; returns {endpoint: [(seconds, status, ttfb), ...]}"""
+    endpoints = list(mix)
+    weights = [mix[e] for e in endpoints]
+    samples = {endpoint: [] for endpoint in endpoints}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    timing = {}
+
+    def worker(n):
+        rng = random.Random(seed * 1000 + n)
+        client = make_client()
+        local = {endpoint: [] for endpoint in endpoints}
+        start_barrier.wait()
+        record_from = timing['start'] + warmup
+        stop_at = record_from + duration
+        while True:
+            endpoint = rng.choices(endpoints, weights)[0]
+            method, path, json_body, form = make_request(endpoint, rng)
+            began = time.perf_counter()
+            if began >= stop_at:
+                break
+            status, ttfb = client.send(method, path, json_body, form)
+            if began >= record_from:
+                local[endpoint].append((time.perf_counter() - began, status, ttfb))
+        with lock:
+            for endpoint, values in local.items():
+                samples[endpoint].extend(values)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    timing['start'] = time.perf_counter()
+    start_barrier.wait()
+    for t in threads:
+        t.join()
+    return samples
+
+
+def summarize(samples, duration):
+    def stats(values):
+        if not values:
+            return {'count': 0}
+        latency = np.array([seconds for seconds, _, _ in values]) * 1000
+        ttfb = np.array([seconds for _, _, seconds in values]) * 1000
+        errors = sum(1 for _, status, _ in values if status not in OK_STATUS)
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+        ttfb50, ttfb95, ttfb99 = np.percentile(ttfb, [50, 95, 99])
+        return {
+            'count': len(values),
+            'errors': errors,
+            'throughput_rps': round(len(values) / duration, 2),
+            'mean_ms': round(float(latency.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(latency.max()), 3),
+            'ttfb_p50_ms': round(float(ttfb50), 3),
+            'ttfb_p95_ms': round(float(ttfb95), 3),
+            'ttfb_p99_ms': round(float(ttfb99), 3)
+        }
+
+    results = {endpoint: stats(values) for endpoint, values in samples.items()}
+    results['all'] = stats([v for values in samples.values() for v in values])
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def server_env(args, database_path):
+    return dict(os.environ, DATABASE_PATH=database_path, LOG_SAMPLE_RATE='0',
+                CHAT_MODEL='fake', FAKE_CHAT_DELAY_MS=str(args.gemini_ms))
+
+
+def run_inprocess(args, database_path):
+    os.environ.update(server_env(args, database_path))
+    import app
+
+    seed_database(InProcessClient(app.app), args.seed)
+    samples = run_load(lambda: InProcessClient(app.app), MIXES[args.mix],
+                       args.concurrency, args.duration, args.warmup, args.seed)
+    app.prediction_writer.flush()
+    return samples
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_gunicorn(args, database_path, log_path):
+    port = free_port()
+    with open(log_path, 'w') as log:
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers),
+             '--threads', str(args.threads), '--bind', f'127.0.0.1:{port}',
+             'app:app'],
+            cwd=BACKEND_DIR, env=server_env(args, database_path), stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.monotonic() + 120
+        while HttpClient('127.0.0.1', port).send('GET', '/api/health')[0] != 200:
+            if server.poll() is not None or time.monotonic() > deadline:
+                with open(log_path) as log:
+                    sys.exit(f'gunicorn did not start:\n{log.read()}')
+            time.sleep(0.5)
+
+        seed_database(HttpClient('127.0.0.1', port), args.seed)
+        return run_load(lambda: HttpClient('127.0.0.1', port), MIXES[args.mix],
+                        args.concurrency, args.duration, args.warmup, args.seed)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def print_table(results):
+    print(f"{'endpoint':<15} {'count':>7} {'errors':>6} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttfb p50':>9}", file=sys.stderr)
+    for endpoint, r in results.items():
+        if r['count']:
+            print(f"{endpoint:<15} {r['count']:>7} {r['errors']:>6} "
+                  f"{r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} "
+                  f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['ttfb_p50_ms']:>9.2f}",
+                  file=sys.stderr)
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before_path} ({before['meta']['commit']}) -> "
+          f"{after_path} ({after['meta']['commit']})")
+    print(f"{'endpoint':<15} {'metric':<15} {'before':>10} {'after':>10} {'change':>8}")
+    for endpoint, new in after['results'].items():
+        old = before['results'].get(endpoint)
+        if not old or not old.get('count') or not new.get('count'):
+            continue
+        for metric in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms',
+                       'ttfb_p50_ms', 'ttfb_p99_ms'):
+            if metric not in old or metric not in new:
+                continue
+            change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0
+            print(f"{endpoint:<15} {metric:<15} {old[metric]:>10.2f} "
+                  f"{new[metric]:>10.2f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API load test')
+    parser.add_argument('--mode', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='default')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds first')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--gemini-ms', type=float, default=200, help='fake chat model delay')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, 'bench.db')
+        if args.mode == 'inprocess':
+            samples = run_inprocess(args, database_path)
+        else:
+            samples = run_gunicorn(args, database_path, os.path.join(tmp, 'gunicorn.log'))
+
+    results = summarize(samples, args.duration)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            **{key: value for key, value in vars(args).items()
+               if key not in ('output', 'compare')}
+        },
+        'results': results
+    }
+    print_table(results)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
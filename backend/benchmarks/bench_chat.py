@@ -0,0 +1,137 @@
+"""
+Microbenchmark: chat intent routing throughput.
+
+Compares the original inline checks from chat() (substring scans for
+greetings and prices, then three re.search calls per message) with
+chat_intents.IntentRouter over a seeded corpus of chat messages:
+greetings, price questions, bookings in varied wording, free-form
+questions for the model and messages where a keyword hides inside a
+longer word ('delhi', 'which', 'separate'). Prints messages per second
+for both, and where and how often they disagree.
+
+Run from the backend directory:
+    python -m benchmarks.bench_chat [messages]
+"""
+
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+from chat_intents import IntentRouter
+
+GREETINGS = ['hi', 'hello', 'Hey there!', 'hello, anyone around?', 'Hi team']
+PRICE_QUESTIONS = ['what are your prices?', 'How much does it cost?',
+                   'rates for a cruiser please', 'price list']
+QUESTIONS = ['Can I carry luggage on a cruiser?', 'Do you rent helmets too?',
+             'Is parking free near the station?', 'What documents do I need?',
+             'Can I return the bike at another station?',
+             'Do you have electric bikes in Bangalore?']
+# Keywords inside longer words: the legacy substring checks misroute these
+TRICKY = ['which bike is best for the hills?', 'Is there a station near the airport?',
+          'book scooter in delhi for 2 hours', 'separate invoice for my booking please',
+          'what does the deposit cover?', 'Do you ship to Chennai?']
+CITIES = ['mumbai', 'Delhi', 'bangalore', 'Hyderabad', 'pune']
+BIKES = ['scooter', 'sports bike', 'sport bike', 'Cruiser']
+DURATIONS = ['{n} hours', '{n} hour', '{n}hrs', '{n} hr', '{n}h']
+
+
+def legacy_route(message):
+    """The pre-chat_intents checks from chat(), as (intent, city, bike, hours)"""
+    user_lower = message.lower()
+    if any(word in user_lower for word in ['hello', 'hi', 'hey']):
+        return ('greeting', None, None, None)
+    if any(word in user_lower for word in ['price', 'cost', 'rate']):
+        return ('prices', None, None, None)
+    city_match = re.search(
+        r'\b(mumbai|delhi|bangalore|hyderabad|pune)\b', user_lower)
+    bike_match = re.search(
+        r'\b(scooter|sports? bike|cruiser)\b', user_lower)
+    duration_match = re.search(r'(\d+)\s*(?:hour|hr|h\b)', user_lower)
+    if not (city_match and bike_match and duration_match):
+        return None
+    bike_raw = bike_match.group(1)
+    bike_type = 'Sports Bike' if 'sport' in bike_raw else 'Scooter' if 'scooter' in bike_raw else 'Cruiser'
+    return ('booking', city_match.group(1).title(), bike_type, int(duration_match.group(1)))
+
+
+def router_route(router, message):
+    """IntentRouter.route in legacy_route's shape (slots only for bookings)"""
+    intent = router.route(message)
+    if intent is None:
+        return None
+    if intent.name != 'booking':
+        return (intent.name, None, None, None)
+    return (intent.name, intent.city, intent.bike, intent.hours)
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.15:
+            corpus.append(rng.choice(GREETINGS))
+        elif kind < 0.25:
+            corpus.append(rng.choice(PRICE_QUESTIONS))
+        elif kind < 0.55:
+            duration = rng.choice(DURATIONS).format(n=rng.randint(1, 8))
+            city, bike = rng.choice(CITIES), rng.choice(BIKES)
+            corpus.append(rng.choice([
+                f'book {bike} in {city} for {duration}',
+                f'I need a {bike} in {city} for {duration} tomorrow',
+                f'{city}: {bike}, {duration}'
+            ]))
+        elif kind < 0.85:
+            corpus.append(rng.choice(QUESTIONS))
+        else:
+            corpus.append(rng.choice(TRICKY))
+    return corpus
+
+
+def messages_per_second(fn, corpus, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for message in corpus:
+            fn(message)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    corpus = make_corpus(n)
+
+    start = time.perf_counter()
+    router = IntentRouter.load()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    print("=" * 70)
+    print(f"Chat intent routing, {n} messages (router compiled in {compile_ms:.2f} ms)")
+    print("=" * 70)
+    timings = {
+        'legacy (inline checks)': messages_per_second(legacy_route, corpus),
+        'IntentRouter': messages_per_second(router.route, corpus)
+    }
+    for label, rate in timings.items():
+        print(f"{label:<24} {rate:12,.0f} msg/s   "
+              f"{rate / timings['legacy (inline checks)']:5.1f}x")
+
+    # (legacy intent, router intent) -> Counter of messages
+    changes = {}
+    for message in corpus:
+        old, new = legacy_route(message), router_route(router, message)
+        if old != new:
+            changes.setdefault((old and old[0], new and new[0]), Counter())[message] += 1
+    totals = {change: sum(messages.values()) for change, messages in changes.items()}
+    print(f"\nRouted differently: {sum(totals.values())} of {n} messages")
+    for (old, new), total in sorted(totals.items(), key=lambda item: -item[1]):
+        examples = ', '.join(repr(message) for message, _ in
+                             changes[old, new].most_common(2))
+        print(f"  {total:>6}  {old or '-':<9} -> {new or '-':<9} e.g. {examples}")
+
+
+if __name__ == '__main__':
+    main()
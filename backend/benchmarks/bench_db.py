@@ -0,0 +1,107 @@
+"""
+Load benchmark: concurrent GET/POST /api/bookings throughput.
+
+Runs the same mixed workload once with per-call connections (DB_POOL=0,
+the old behaviour) and once with the pooled WAL connection layer, each in
+its own process against a fresh temporary database.
+
+Run from the backend directory:
+    python -m benchmarks.bench_db [threads] [seconds]
+"""
+
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+
+def run_workload(threads, seconds):
+    """Hammer the bookings endpoints from ``threads`` threads (child mode)"""
+    import app
+
+    user = 'bench@example.com'
+    booking = {
+        'user_email': user, 'city': 'Pune', 'bike_type': 'Scooter',
+        'duration': 2, 'date': '2026-01-01', 'start_time': '10:00',
+        'total_price': 400
+    }
+    seed = app.app.test_client()
+    for n in range(20):
+        day = date(2025, 1, 1) + timedelta(days=n)
+        seed.post('/api/bookings', json=dict(booking, date=day.isoformat()))
+    # Writes go to other accounts so the read size stays realistic, and to
+    # a new day each time so the Pune scooter fleet never runs out
+    booking = dict(booking, user_email='writer@example.com')
+    days = itertools.count(1)
+
+    counts = {'get': 0, 'post': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def worker(n):
+        client = app.app.test_client()
+        local = {'get': 0, 'post': 0, 'errors': 0}
+        i = 0
+        while time.perf_counter() < stop_at:
+            # 4 reads for every write
+            if i % 5 == 4:
+                day = date(2026, 1, 1) + timedelta(days=next(days))
+                ok = client.post('/api/bookings', json=dict(
+                    booking, date=day.isoformat())).status_code == 200
+                local['post'] += 1
+            else:
+                ok = client.get(
+                    f'/api/bookings?user_email={user}').status_code == 200
+                local['get'] += 1
+            if not ok:
+                local['errors'] += 1
+            i += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    counts['get_per_sec'] = round(counts['get'] / seconds, 1)
+    counts['post_per_sec'] = round(counts['post'] / seconds, 1)
+    print(json.dumps(counts))
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    results = {}
+    for label, pool in [('before (DB_POOL=0)', '0'), ('after (pooled WAL)', '1')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DB_POOL=pool,
+                       DATABASE_PATH=os.path.join(tmp, 'bench.db'))
+            out = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_db', '--child',
+                 str(threads), str(seconds)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            results[label] = json.loads(out.strip().splitlines()[-1])
+
+    print("=" * 80)
+    print(f"/api/bookings load test: {threads} threads, {seconds}s per run")
+    print("=" * 80)
+    for label, r in results.items():
+        print(f"{label:<20} GET {r['get_per_sec']:8.1f}/s   "
+              f"POST {r['post_per_sec']:8.1f}/s   errors {r['errors']}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_workload(int(sys.argv[2]), float(sys.argv[3]))
+    else:
+        main()
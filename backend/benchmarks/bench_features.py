@@ -0,0 +1,112 @@
+"""
+Microbenchmark: per-row cost of feature engineering.
+
+Compares the original per-request implementation (dict literals and
+strptime on every call) with features.row_features (module-level maps,
+memoized calendar) and with the columnar feature_matrix used by the batch
+endpoint. Checks that all three produce the same features.
+
+Run from the backend directory:
+    python -m benchmarks.bench_features [rows]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from features import HOLIDAYS, columns_to_matrix, feature_matrix, row_features
+
+FEATURES = ['season', 'yr', 'mnth', 'hr', 'holiday', 'weekday', 'workingday',
+            'weathersit', 'temp', 'atemp', 'hum', 'windspeed']
+
+
+def legacy_features(data, prediction_type='day'):
+    """The pre-features.py implementation, for comparison"""
+    date_obj = datetime.strptime(data.get('date', datetime.now().strftime('%Y-%m-%d')),
+                                 '%Y-%m-%d')
+    year, month, weekday = date_obj.year, date_obj.month, date_obj.weekday()
+    season_map = {'spring': 1, 'summer': 2, 'fall': 3, 'autumn': 3, 'winter': 4}
+    season = season_map.get(data.get('season', 'summer').lower(), 2)
+    weather_map = {'clear': 1, 'cloudy': 2, 'mist': 2, 'rainy': 3,
+                   'light_rain': 3, 'heavy_rain': 4, 'storm': 4}
+    weathersit = weather_map.get(data.get('weather', 'clear').lower(), 1)
+    temp = (float(data.get('temperature', 20)) + 10) / 50
+    hum = float(data.get('humidity', 50)) / 100
+    windspeed = float(data.get('windSpeed', 10)) / 67
+    holiday = 1 if data.get('isHoliday', False) else 0
+    features = {
+        'season': season, 'yr': 1 if year >= 2012 else 0, 'mnth': month,
+        'holiday': holiday, 'weekday': weekday,
+        'workingday': 1 if (weekday not in [5, 6] and not holiday) else 0,
+        'weathersit': weathersit, 'temp': temp,
+        'atemp': temp - (windspeed * 0.05), 'hum': hum, 'windspeed': windspeed
+    }
+    if prediction_type == 'hour':
+        features['hr'] = int(data.get('hour', 12))
+    return features
+
+
+def make_payloads(n, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2011, 1, 1).toordinal()
+    payloads = []
+    for _ in range(n):
+        day = datetime.fromordinal(start + rng.randrange(730)).date()
+        payloads.append({
+            'date': day.isoformat(),
+            'hour': rng.randrange(24),
+            'season': rng.choice(['spring', 'summer', 'fall', 'winter']),
+            'weather': rng.choice(['clear', 'cloudy', 'rainy', 'storm']),
+            'temperature': rng.randrange(-10, 40),
+            'humidity': rng.randrange(0, 100),
+            'windSpeed': rng.randrange(0, 60),
+            # Flag calendar holidays too, so the legacy path agrees
+            'isHoliday': rng.random() < 0.05 or HOLIDAYS.is_holiday(day)
+        })
+    return payloads
+
+
+def per_row_us(fn, payloads, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(payloads)
+        best = min(best, time.perf_counter() - start)
+    return best / len(payloads) * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    payloads = make_payloads(n)
+
+    legacy = columns_to_matrix(
+        {name: np.array([legacy_features(p, 'hour')[name] for p in payloads])
+         for name in FEATURES}, FEATURES)
+    rows = columns_to_matrix(
+        {name: np.array([row_features(p, 'hour')[name] for p in payloads])
+         for name in FEATURES}, FEATURES)
+    matrix, valid = feature_matrix(payloads, FEATURES, 'hour')
+    assert valid.all()
+    assert np.array_equal(legacy, rows) and np.array_equal(legacy, matrix)
+
+    print("=" * 70)
+    print(f"Feature engineering, {n} payloads over 730 distinct dates")
+    print("=" * 70)
+    timings = {
+        'legacy (per row)': per_row_us(
+            lambda ps: [legacy_features(p, 'hour') for p in ps], payloads),
+        'row_features (per row)': per_row_us(
+            lambda ps: [row_features(p, 'hour') for p in ps], payloads),
+        'feature_matrix (columnar)': per_row_us(
+            lambda ps: feature_matrix(ps, FEATURES, 'hour'), payloads)
+    }
+    for label, us in timings.items():
+        print(f"{label:<28} {us:8.2f} us/row   "
+              f"{timings['legacy (per row)'] / us:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
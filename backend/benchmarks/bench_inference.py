@@ -0,0 +1,94 @@
+"""
+Microbenchmark: per-request single-row inference latency.
+
+Compares the old DataFrame path (list -> pd.DataFrame -> DMatrix ->
+predict) with the FeatureEncoder + inplace_predict path used by the API,
+and inplace_predict with the compiled NumPy ensemble (INFERENCE_ENGINE=numpy)
+for single rows and small batches.
+
+Run from the backend directory:
+    python -m benchmarks.bench_inference [iterations]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+import app
+from features import row_features
+from tree_ensemble import TreeEnsemble
+
+
+def time_per_call(fn, iterations):
+    """Return per-call latencies in microseconds"""
+    fn()  # warm up
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples * 1e6
+
+
+def report(label, samples):
+    print(f"{label:<28} p50 {np.percentile(samples, 50):8.1f} us   "
+          f"p99 {np.percentile(samples, 99):8.1f} us   "
+          f"mean {samples.mean():8.1f} us")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payload = {
+        'date': '2012-06-01', 'hour': 8, 'season': 'summer',
+        'weather': 'clear', 'temperature': 25, 'humidity': 60,
+        'windSpeed': 12, 'isHoliday': False
+    }
+
+    print("=" * 80)
+    print(f"Single-row inference, {iterations} iterations")
+    print("=" * 80)
+
+    for prediction_type in ('day', 'hour'):
+        model = app.get_model(prediction_type)
+        if model is None:
+            print(f"{prediction_type} model not loaded, skipping")
+            continue
+
+        names = model.features
+        features = row_features(payload, prediction_type)
+
+        def dataframe_path():
+            values = [features.get(f, 0) for f in names]
+            df = pd.DataFrame([values], columns=names)
+            return model.booster.predict(xgb.DMatrix(df))[0]
+
+        def encoder_path():
+            return model.predict(model.encoder.encode(features))[0]
+
+        assert np.isclose(dataframe_path(), encoder_path(), rtol=1e-5)
+
+        old = time_per_call(dataframe_path, iterations)
+        new = time_per_call(encoder_path, iterations)
+        report(f"{prediction_type}: DataFrame + predict", old)
+        report(f"{prediction_type}: encoder + inplace", new)
+        print(f"{prediction_type}: p50 speedup {np.median(old) / np.median(new):.1f}x\n")
+
+        ensemble = TreeEnsemble.from_booster(model.booster)
+        row = model.encoder.encode(features).copy()
+        for batch_size in (1, 8, 64, 512):
+            matrix = np.repeat(row, batch_size, axis=0)
+            assert np.allclose(ensemble.predict(matrix),
+                               model.booster.inplace_predict(matrix), rtol=1e-5)
+            xgb_samples = time_per_call(
+                lambda: model.booster.inplace_predict(matrix), iterations)
+            numpy_samples = time_per_call(lambda: ensemble.predict(matrix), iterations)
+            report(f"{prediction_type}: xgboost  x{batch_size}", xgb_samples)
+            report(f"{prediction_type}: numpy    x{batch_size}", numpy_samples)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Microbenchmark: availability queries against the booking interval index.
+
+Answers "how many bikes are out at T" and "how many are free for this
+whole ride" for random (city, bike type, time) queries. The baseline is
+what checking availability used to require: a scan of that city's and
+bike type's bookings in SQLite, turning date/start_time/duration into an
+interval for every row. The same queries then go through
+inventory.IntervalIndex, and the two answers are checked for agreement.
+Also times Inventory.book, the BEGIN IMMEDIATE check-and-insert, on a
+temporary database.
+
+Run from the backend directory:
+    python -m benchmarks.bench_inventory [bookings]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from inventory import Inventory, IntervalIndex, booking_interval
+
+CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Hyderabad', 'Pune']
+BIKES = ['Scooter', 'Sports Bike', 'Cruiser']
+DAYS = 365
+QUERIES = 2000
+
+
+def make_bookings(n, seed=0):
+    rng = random.Random(seed)
+    return [(rng.choice(CITIES), rng.choice(BIKES),
+             (date(2026, 1, 1) + timedelta(days=rng.randrange(DAYS))).isoformat(),
+             f'{rng.randrange(6, 22):02d}:{rng.choice(["00", "30"])}',
+             rng.randrange(1, 6)) for _ in range(n)]
+
+
+def create_db(path, bookings):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_email TEXT NOT NULL,
+            city TEXT NOT NULL, bike_type TEXT NOT NULL, duration INTEGER NOT NULL,
+            date TEXT NOT NULL, start_time TEXT NOT NULL, total_price INTEGER NOT NULL,
+            status TEXT DEFAULT 'confirmed', created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    Inventory.create_table(conn.cursor())
+    conn.executemany(
+        'INSERT INTO bookings (user_email, city, bike_type, date, start_time, duration, '
+        "total_price) VALUES ('bench@example.com', ?, ?, ?, ?, ?, 0)", bookings)
+    conn.commit()
+    return conn
+
+
+def scan_peak(conn, city, bike_type, start, end):
+    """Bikes out at once within [start, end), from a scan of the bookings"""
+    intervals = []
+    for day, start_time, duration in conn.execute(
+            'SELECT date, start_time, duration FROM bookings '
+            'WHERE city = ? AND bike_type = ?', (city, bike_type)):
+        b_start, b_end = booking_interval(day, start_time, duration)
+        if b_start < end and b_end > start:
+            intervals.append((b_start, b_end))
+    points = [start] + [s for s, _ in intervals if s > start]
+    return max((sum(1 for s, e in intervals if s <= at < e) for at in points), default=0)
+
+
+def make_queries(n, seed=1):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        day = (date(2026, 1, 1) + timedelta(days=rng.randrange(DAYS))).isoformat()
+        start, end = booking_interval(day, f'{rng.randrange(6, 22):02d}:15',
+                                      rng.randrange(1, 4))
+        queries.append((rng.choice(CITIES), rng.choice(BIKES), start, end))
+    return queries
+
+
+def per_query_us(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    bookings = make_bookings(n)
+    queries = make_queries(QUERIES)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_db(os.path.join(tmp, 'bench.db'), bookings)
+
+        start = time.perf_counter()
+        index = IntervalIndex()
+        for city, bike_type, day, start_time, duration in bookings:
+            index.add((city.lower(), bike_type.lower()),
+                      *booking_interval(day, start_time, duration))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        def index_peak(city, bike_type, start, end):
+            return index.peak((city.lower(), bike_type.lower()), start, end)
+
+        def index_at(city, bike_type, start, end):
+            return index.active_at((city.lower(), bike_type.lower()), start)
+
+        for query in queries[:200]:
+            assert scan_peak(conn, *query) == index_peak(*query), query
+
+        print("=" * 70)
+        print(f"Availability, {n} bookings over {DAYS} days "
+              f"(index built in {build_ms:.0f} ms)")
+        print("=" * 70)
+        timings = {
+            'SQLite scan (peak)': per_query_us(
+                lambda *q: scan_peak(conn, *q), queries[:200]),
+            'index: free at T': per_query_us(index_at, queries),
+            'index: free for a ride': per_query_us(index_peak, queries)
+        }
+        for label, us in timings.items():
+            print(f"{label:<24} {us:10.2f} us/query   "
+                  f"{timings['SQLite scan (peak)'] / us:8.0f}x")
+
+        inventory = Inventory(lambda: conn, {}, {bike: 10 ** 9 for bike in BIKES})
+        inventory.sync(conn)
+        rng = random.Random(2)
+        start = time.perf_counter()
+        for _ in range(500):
+            city, bike_type, day, start_time, duration = make_bookings(1, rng.random())[0]
+            inventory.book(conn, 'bench@example.com', city, bike_type, duration,
+                           day, start_time, 0)
+        print(f"\nInventory.book (check + insert, one commit each): "
+              f"{(time.perf_counter() - start) / 500 * 1e3:.2f} ms/booking")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Memory report: per-worker unique memory (USS) under gunicorn.
+
+Starts gunicorn with N workers, once without and once with model
+preloading (PRELOAD_MODELS=1), sends prediction traffic so every worker
+has scored both models, then reads /proc/<pid>/smaps_rollup for each
+worker. USS (Private_Clean + Private_Dirty) is the memory a worker does
+not share with anyone else, i.e. what each extra worker really costs.
+
+Linux only. Run from the backend directory:
+    python -m benchmarks.bench_memory [workers]
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def smaps_rollup(pid):
+    """Memory counters in KB from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def post(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(),
+        headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def measure(workers, preload):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PRELOAD_MODELS='1' if preload else '0',
+                   DATABASE_PATH=os.path.join(tmp, 'bench.db'),
+                   MODEL_WATCH_INTERVAL='0')
+        master = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-w', str(workers),
+             '-b', f'127.0.0.1:{port}', 'app:app'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base = f'http://127.0.0.1:{port}'
+            deadline = time.time() + 120
+            while True:
+                try:
+                    urllib.request.urlopen(f'{base}/api/health', timeout=5).read()
+                    break
+                except OSError:
+                    if time.time() > deadline:
+                        raise RuntimeError('gunicorn did not start')
+                    time.sleep(0.5)
+
+            # Enough traffic that every worker serves both models
+            for i in range(workers * 40):
+                post(f'{base}/api/predict/day', {'temperature': i % 40})
+                post(f'{base}/api/predict/hour', {'hour': i % 24})
+            time.sleep(1)
+
+            pids = child_pids(master.pid)
+            rollups = [smaps_rollup(pid) for pid in pids]
+            uss = [(r.get('Private_Clean', 0) + r.get('Private_Dirty', 0)) / 1024
+                   for r in rollups]
+            return {
+                'workers': len(pids),
+                'uss_mb_per_worker': [round(u, 1) for u in uss],
+                'uss_mb_mean': round(sum(uss) / len(uss), 1),
+                'pss_mb_total': round(sum(r.get('Pss', 0) for r in rollups) / 1024, 1),
+                'rss_mb_mean': round(
+                    sum(r.get('Rss', 0) for r in rollups) / len(rollups) / 1024, 1),
+            }
+        finally:
+            master.send_signal(signal.SIGTERM)
+            master.wait(timeout=30)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    report = {
+        'per-worker load': measure(workers, preload=False),
+        'preloaded in master': measure(workers, preload=True),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
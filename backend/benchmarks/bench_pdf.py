@@ -0,0 +1,209 @@
+"""
+Benchmark: PDF upload extraction on synthetic 1-100 page weather reports.
+
+Compares the original extraction (text of every page joined, then a
+dozen regex searches and keyword scans over the whole document) with
+pdf_extraction.extract_pdf, which scans page by page and stops reading
+once every field is found. Two kinds of report are generated:
+
+    complete  every field is stated on the first page
+    sparse    no hour or holiday anywhere, so every page has to be read
+
+Also checks that parse_pdf_for_prediction still gives the original
+results on whole-document text.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pdf [max_pages]
+"""
+
+import io
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+import PyPDF2
+
+from pdf_extraction import extract_pdf, parse_pdf_for_prediction
+
+FILLER = ('the city recorded steady traffic near stations and bikes were '
+          'rented by commuters across districts during the morning peak with '
+          '12 stations and 340 docks available for the next service window').split()
+
+HEADER_LINES = [
+    'Date: 2024-06-14', 'Hour: 9', 'Temperature: 31 C', 'Humidity: 72%',
+    'Wind speed: 14 km/h', 'Season: summer', 'Conditions: cloudy',
+    'Holiday: regional festival'
+]
+
+
+def make_pdf(pages):
+    """Minimal PDF with one Helvetica text line per entry of ``pages[i]``"""
+    def escape(line):
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    kids = ' '.join(f'{4 + 2 * i} 0 R' for i in range(len(pages)))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        f'<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>'.encode(),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+    ]
+    for i, lines in enumerate(pages):
+        stream = ('BT /F1 11 Tf 50 780 Td 14 TL ' +
+                  ' '.join(f"({escape(line)}) '" for line in lines) +
+                  ' ET').encode('latin-1')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>'.encode())
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_report(page_count, complete=True, seed=0):
+    """Pages of text lines: a header block on page one, then filler"""
+    rng = random.Random(seed)
+    pages = [[' '.join(rng.choice(FILLER) for _ in range(12)) for _ in range(45)]
+             for _ in range(page_count)]
+    header = HEADER_LINES if complete else \
+        [line for line in HEADER_LINES if not line.startswith(('Hour', 'Holiday'))]
+    pages[0][:len(header)] = header
+    return pages
+
+
+def legacy_parse(text):
+    """The original parse_pdf_for_prediction, for comparison"""
+    text_lower = text.lower()
+    extracted_data = {
+        'date': datetime.now().strftime('%Y-%m-%d'), 'hour': 12,
+        'temperature': 25, 'humidity': 60, 'windSpeed': 15, 'season': 'summer',
+        'weather': 'clear', 'isHoliday': False, 'confidence': 'low',
+        'extracted_fields': []
+    }
+    score = 0
+
+    def first_valid(patterns, low, high):
+        for pattern in patterns:
+            match = re.search(pattern, text_lower)
+            if match and low <= float(match.group(1)) <= high:
+                return int(float(match.group(1)))
+        return None
+
+    numeric = [
+        ('temperature', [r'temperature[:\s]*(\d+\.?\d*)\s*[°cC]',
+                         r'temp[:\s]*(\d+\.?\d*)\s*[°cC]',
+                         r'(\d+\.?\d*)\s*[°cC]', r'(\d+\.?\d*)\s*celsius'], -10, 50),
+        ('humidity', [r'humidity[:\s]*(\d+\.?\d*)\s*%',
+                      r'relative\s*humidity[:\s]*(\d+)', r'rh[:\s]*(\d+)\s*%'], 0, 100),
+        ('windSpeed', [r'wind\s*speed[:\s]*(\d+\.?\d*)\s*(?:km/h|kmph|kph)',
+                       r'wind[:\s]*(\d+\.?\d*)\s*(?:km/h|kmph|kph)'], 0, 200),
+    ]
+    for field, patterns, low, high in numeric:
+        value = first_valid(patterns, low, high)
+        if value is not None:
+            extracted_data[field] = value
+            extracted_data['extracted_fields'].append(field)
+            score += 1
+
+    date_match = re.search(r'date[:\s]*(\d{4}-\d{2}-\d{2})', text_lower)
+    if date_match:
+        extracted_data['date'] = date_match.group(1)
+        extracted_data['extracted_fields'].append('date')
+        score += 1
+    hour_match = re.search(r'hour[:\s]*(\d{1,2})', text_lower)
+    if hour_match and 0 <= int(hour_match.group(1)) <= 23:
+        extracted_data['hour'] = int(hour_match.group(1))
+        extracted_data['extracted_fields'].append('hour')
+        score += 1
+
+    keyword_fields = [
+        ('season', 'season', 0.5, {
+            'spring': ['spring', 'march', 'april', 'may'],
+            'summer': ['summer', 'june', 'july', 'august'],
+            'fall': ['fall', 'autumn', 'september', 'october', 'november'],
+            'winter': ['winter', 'december', 'january', 'february']}),
+        ('weather', 'weather', 1, {
+            'clear': ['clear', 'sunny', 'bright'],
+            'cloudy': ['cloudy', 'overcast', 'clouds'],
+            'rainy': ['rain', 'rainy', 'drizzle'],
+            'heavy_rain': ['heavy rain', 'thunderstorm', 'storm']}),
+        ('isHoliday', 'holiday', 0.5, {True: ['holiday', 'festival']}),
+    ]
+    for field, label, weight, choices in keyword_fields:
+        for value, keywords in choices.items():
+            if any(keyword in text_lower for keyword in keywords):
+                extracted_data[field] = value
+                extracted_data['extracted_fields'].append(label)
+                score += weight
+                break
+
+    extracted_data['confidence'] = 'high' if score >= 5 else 'medium' if score >= 3 else 'low'
+    return extracted_data
+
+
+def legacy_extract(content):
+    reader = PyPDF2.PdfReader(io.BytesIO(content))
+    return legacy_parse('\n'.join(page.extract_text() or '' for page in reader.pages))
+
+
+def check_parity(seed=1, samples=2000):
+    """Random snippets (including out-of-range and competing values) parse alike"""
+    rng = random.Random(seed)
+    snippets = HEADER_LINES + [
+        'temp 80 C', '99°c outside', '12 celsius', 'relative humidity 40',
+        'rh: 55 %', 'humidity: 140%', 'wind 250 kmph', 'wind: 9 kph',
+        'hour: 31', 'date 2025-01-02', 'heavy rain', 'thunderstorm',
+        'drizzle', 'overcast', 'bright', 'autumn', 'february', 'may',
+        'no holiday', 'Temperature:', '19 C'
+    ]
+    for _ in range(samples):
+        text = '\n'.join(rng.choice(snippets + FILLER) for _ in range(rng.randrange(1, 12)))
+        assert parse_pdf_for_prediction(text) == legacy_parse(text), text
+
+
+def best_ms(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    max_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    check_parity()
+    print("✅ parse_pdf_for_prediction matches the original parser")
+
+    print("=" * 78)
+    print(f"{'report':<10} {'pages':>5} {'original ms':>12} {'streamed ms':>12} "
+          f"{'pages read':>11} {'speedup':>8}")
+    print("=" * 78)
+    for complete in (True, False):
+        for page_count in (p for p in (1, 10, 50, 100) if p <= max_pages):
+            content = make_pdf(make_report(page_count, complete))
+            result = extract_pdf(content, max_pages)
+            assert result['extracted_data'] == legacy_extract(content)
+
+            repeats = 5 if page_count <= 10 else 2
+            original = best_ms(lambda: legacy_extract(content), repeats)
+            streamed = best_ms(lambda: extract_pdf(content, max_pages), repeats)
+            print(f"{'complete' if complete else 'sparse':<10} {page_count:>5} "
+                  f"{original:>12.1f} {streamed:>12.1f} "
+                  f"{result['metadata']['pages_read']:>11} {original / streamed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Build the precomputed prediction grids used with LOOKUP_TABLES=1.
+
+Scores every cell of the grid (see lookup_table.py) with the active model,
+measures the interpolation error against the model on random requests and
+writes models/xgb_<kind>_lookup.npy/.json. Run it after converting or
+replacing a model; a table built for another model version is ignored.
+
+    python build_lookup_table.py [day] [hour] \
+        [--temperature -10,-5,...] [--humidity 0,20,...] [--wind 0,10,...]
+
+Axes not given on the command line come from the model kind's defaults
+(lookup_table.DEFAULT_CONTINUOUS_AXES). Finer axes lower the error but
+grow the table and the build time linearly: on one core the default day
+grid is ~260M cells, ~520 MB as float16 and takes about 40 minutes; the
+hour grid is ~50M cells, ~100 MB and about 11 minutes.
+"""
+
+import argparse
+import time
+
+from features import columns_to_matrix, derive_columns
+from lookup_table import DEFAULT_CONTINUOUS_AXES, build_lookup_table, save_lookup_table
+
+
+def parse_axis(text):
+    return tuple(sorted(float(v) for v in text.split(',')))
+
+
+parser = argparse.ArgumentParser(description='Build prediction lookup tables')
+parser.add_argument('kinds', nargs='*', default=['day', 'hour'], choices=['day', 'hour'])
+parser.add_argument('--temperature', type=parse_axis)
+parser.add_argument('--humidity', type=parse_axis)
+parser.add_argument('--wind', type=parse_axis)
+args = parser.parse_args()
+
+import app  # noqa: E402  (loads the models)
+
+overrides = {'temperature': args.temperature, 'humidity': args.humidity,
+             'windSpeed': args.wind}
+
+print("=" * 60)
+print("Building prediction lookup tables")
+print("=" * 60)
+
+for kind in args.kinds:
+    model = app.get_model(kind)
+    if model is None:
+        print(f"❌ {kind} model not loaded, skipping")
+        continue
+
+    axes = {name: overrides[name] or values
+            for name, values in DEFAULT_CONTINUOUS_AXES[kind].items()}
+    start = time.perf_counter()
+    print(f"\n{kind}: scoring grid for model {model.version}")
+    grid, meta = build_lookup_table(
+        model, derive_columns, columns_to_matrix, axes)
+    grid_path, meta_path = save_lookup_table(kind, grid, meta, app.MODELS_DIR)
+
+    error = meta['error']
+    print(f"✅ Saved {grid_path} ({grid.size:,} cells, {grid.nbytes / 1e6:.1f} MB, "
+          f"{time.perf_counter() - start:.0f} s)")
+    print(f"📊 Error vs model on {error['rows']:,} requests: mean {error['mean']}, "
+          f"p99 {error['p99']}, max {error['max']}")
@@ -0,0 +1,226 @@
+"""
+Bounded, cached calls to the chat LLM behind the chat fallback.
+
+The model call runs on a small thread pool and the request thread stops
+waiting after ``timeout`` seconds, so a slow Gemini response cannot hold
+a gunicorn worker for longer than that. A semaphore caps the calls in
+flight (a timed-out call keeps its slot until the model returns); a
+request that cannot get a slot before its deadline is answered without
+the model instead of queueing.
+
+Replies are cached per normalized question (lower-case, punctuation and
+repeated whitespace removed) in an LRU cache with a TTL, so repeated
+FAQs are answered without a model call.
+
+``stream`` relays a streamed completion chunk by chunk under the same
+limits; there ``timeout`` bounds the wait for each chunk and
+``stream_timeout`` the whole reply.
+
+FakeChatModel stands in for ``genai.GenerativeModel`` (CHAT_MODEL=fake)
+for local testing and benchmarks.
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+log = logging.getLogger(__name__)
+
+_END = object()  # end of a streamed reply
+
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_question(question):
+    """Cache key for a question: 'Do you deliver helmets?!' -> 'do you deliver helmets'"""
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', question.lower())).strip()
+
+
+class FakeChatModel:
+    """Local stand-in for genai.GenerativeModel with a fixed delay
+
+    With ``stream=True`` the reply arrives two words at a time, the delay
+    spread evenly over the chunks, like a streamed completion.
+    """
+
+    class Response:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, delay=0.2,
+                 reply='Bikes can be picked up and returned at any of our stations.'):
+        self.delay = delay
+        self.reply = reply
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        if stream:
+            return self._stream()
+        time.sleep(self.delay)
+        return self.Response(self.reply)
+
+    def _stream(self):
+        words = self.reply.split(' ')
+        chunks = [' '.join(words[i:i + 2]) + ' ' for i in range(0, len(words), 2)]
+        for chunk in chunks:
+            time.sleep(self.delay / len(chunks))
+            yield self.Response(chunk)
+
+
+class ChatClient:
+    """Deadline, concurrency limit and reply cache around a chat model"""
+
+    def __init__(self, model, prompt_template, cache, timeout=8.0,
+                 max_concurrency=4, observe=None, stream_timeout=60.0):
+        self.model = model
+        self.prompt_template = prompt_template
+        self.cache = cache
+        self.timeout = timeout
+        self.stream_timeout = stream_timeout
+        self.max_concurrency = max_concurrency
+        self.observe = observe  # observe(stage, seconds) for call timings
+        self.calls = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.errors = 0
+        self._pool = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _runtime(self):
+        # Threads do not survive a fork, so each process gets its own pool
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix='chat-model')
+                self._slots = threading.BoundedSemaphore(self.max_concurrency)
+                self._pid = os.getpid()
+            return self._pool, self._slots
+
+    def _generate(self, question):
+        response = self.model.generate_content(
+            self.prompt_template.format(question=question))
+        return response.text.strip()
+
+    def _generate_stream(self, question, chunks):
+        try:
+            for chunk in self.model.generate_content(
+                    self.prompt_template.format(question=question), stream=True):
+                if chunk.text:
+                    chunks.put(chunk.text)
+            chunks.put(_END)
+        except Exception as e:
+            chunks.put(e)
+
+    def _start(self, target, *args):
+        """Submit a model call if a slot frees up in time; None if not"""
+        pool, slots = self._runtime()
+        if not slots.acquire(timeout=self.timeout):
+            self.rejected += 1
+            log.warning('Chat model busy: %d calls in flight', self.max_concurrency)
+            return None
+        try:
+            future = pool.submit(target, *args)
+        except RuntimeError:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        self.calls += 1
+        return future
+
+    def ask(self, question):
+        """The model's reply, or None when there is no model or no reply in time"""
+        key = normalize_question(question)
+        reply = self.cache.get(key)
+        if reply is not None or self.model is None:
+            return reply
+
+        start = time.perf_counter()
+        future = self._start(self._generate, question)
+        if future is None:
+            return None
+
+        try:
+            reply = future.result(timeout=max(0.0, self.timeout - (time.perf_counter() - start)))
+        except FutureTimeout:
+            self.timeouts += 1
+            log.warning('Chat model gave no reply within %.1fs', self.timeout)
+            return None
+        except Exception as e:
+            self.errors += 1
+            log.warning('Chat model error: %s', e)
+            return None
+        finally:
+            if self.observe is not None:
+                self.observe('gemini_call', time.perf_counter() - start)
+
+        if reply:
+            self.cache.put(key, reply)
+        return reply
+
+    def stream(self, question):
+        """Yield the reply in chunks as the model produces them
+
+        A cached reply is one chunk. Yields nothing when there is no model
+        or no slot; stops early when a chunk or the whole reply is late.
+        """
+        key = normalize_question(question)
+        reply = self.cache.get(key)
+        if reply is not None:
+            yield reply
+            return
+        if self.model is None:
+            return
+
+        start = time.perf_counter()
+        chunks = queue.Queue()
+        if self._start(self._generate_stream, question, chunks) is None:
+            return
+
+        parts = []
+        try:
+            while True:
+                remaining = min(self.timeout,
+                                self.stream_timeout - (time.perf_counter() - start))
+                try:
+                    chunk = chunks.get(timeout=max(0.0, remaining))
+                except queue.Empty:
+                    self.timeouts += 1
+                    log.warning('Chat model stream stalled after %d chunks', len(parts))
+                    return
+                if chunk is _END:
+                    break
+                if isinstance(chunk, Exception):
+                    self.errors += 1
+                    log.warning('Chat model error: %s', chunk)
+                    return
+                parts.append(chunk)
+                yield chunk
+        finally:
+            if self.observe is not None:
+                self.observe('gemini_call', time.perf_counter() - start)
+
+        reply = ''.join(parts).strip()
+        if reply:
+            self.cache.put(key, reply)
+
+    def stats(self):
+        return {
+            'model': type(self.model).__name__ if self.model is not None else None,
+            'timeout': self.timeout,
+            'stream_timeout': self.stream_timeout,
+            'max_concurrency': self.max_concurrency,
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'cache': self.cache.stats()
+        }
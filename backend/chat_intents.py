@@ -0,0 +1,132 @@
+"""
+Intent router for the chat messages answered without the model.
+
+Cities, bikes (aliases and hourly prices), duration units and the intent
+table are loaded once from ``data/chat_catalog.json`` and compiled into
+one regular expression: an alternation of every catalog phrase, plus
+"<number> <unit>" for durations, anchored so that it only matches whole
+words. A message is lower-cased and scanned once by that expression, and
+only the matches are looked at in Python. 'hi' therefore no longer fires
+inside 'delhi' or 'which', nor 'rate' inside 'separate'.
+
+Intents are tried in table order. One matches when one of its keywords
+was seen (if it has any) and all of its slots were filled; the first
+occurrence of each slot wins.
+"""
+
+import json
+import os
+import re
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'data', 'chat_catalog.json')
+
+SLOTS = ('city', 'bike', 'hours')
+
+# Words are runs of letters: '2hrs' is '2' then 'hrs', 'delhi' has no 'hi'
+_WORD = re.compile(r'[^\W\d_]+')
+_NOT_AFTER_LETTER = r'(?<![^\W\d_])'
+_NOT_BEFORE_LETTER = r'(?![^\W\d_])'
+
+
+def words(text):
+    return _WORD.findall(text.lower())
+
+
+def _alternation(phrases):
+    # Longest first, so 'sports bike' is tried before a shorter phrase
+    return '|'.join(r'\W+'.join(map(re.escape, phrase.split(' ')))
+                    for phrase in sorted(phrases, key=len, reverse=True))
+
+
+class Intent:
+    """A routed message: intent name plus the slots it filled"""
+
+    __slots__ = ('name', 'city', 'bike', 'hours')
+
+    def __init__(self, name, city=None, bike=None, hours=None):
+        self.name = name
+        self.city = city
+        self.bike = bike
+        self.hours = hours
+
+    def __repr__(self):
+        return (f'Intent({self.name!r}, city={self.city!r}, '
+                f'bike={self.bike!r}, hours={self.hours!r})')
+
+
+class IntentRouter:
+    """Catalog-driven, single-pass matcher for chat intents"""
+
+    def __init__(self, cities, bikes, duration_units, intents):
+        self.cities = list(cities)
+        self.prices = {bike: entry['price_per_hour'] for bike, entry in bikes.items()}
+
+        # 'sports bike' -> ('bike', 'Sports Bike'), 'hi' -> ('keyword', 'greeting'), ...
+        self._phrases = {}
+        phrases = [(city, 'city', city) for city in self.cities]
+        phrases += [(alias, 'bike', bike)
+                    for bike, entry in bikes.items() for alias in entry['aliases']]
+
+        self._intents = []
+        for intent in intents:
+            required = tuple(intent.get('slots', ()))
+            unknown = set(required) - set(SLOTS)
+            if unknown:
+                raise ValueError(
+                    f"Intent {intent['name']!r} has unknown slots: {', '.join(sorted(unknown))}")
+            keywords = intent.get('keywords', ())
+            phrases += [(keyword, 'keyword', intent['name']) for keyword in keywords]
+            self._intents.append((intent['name'], bool(keywords), required))
+
+        for phrase, kind, value in phrases:
+            key = ' '.join(words(phrase))
+            if not key:
+                raise ValueError(f'Empty catalog phrase for {kind} {value!r}')
+            self._phrases.setdefault(key, (kind, value))
+
+        units = {' '.join(words(unit)) for unit in duration_units}
+        self._pattern = re.compile(
+            rf'(?<!\d)(\d+)\s*(?:{_alternation(units)}){_NOT_BEFORE_LETTER}'
+            rf'|{_NOT_AFTER_LETTER}({_alternation(self._phrases)}){_NOT_BEFORE_LETTER}')
+        # What a message without any catalog phrase routes to
+        self._unmatched = self._resolve(set(), {})
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['cities'], data['bikes'], data['duration_units'], data['intents'])
+
+    def _resolve(self, keywords, slots):
+        for name, has_keywords, required in self._intents:
+            if has_keywords and name not in keywords:
+                continue
+            for slot in required:
+                if slot not in slots:
+                    break
+            else:
+                return Intent(name, slots.get('city'), slots.get('bike'), slots.get('hours'))
+        return None
+
+    def route(self, message):
+        """The first intent in the table that the message satisfies, or None"""
+        matches = self._pattern.findall(message.lower())
+        if not matches:
+            return self._unmatched
+
+        keywords = set()
+        slots = {}
+        for number, phrase in matches:
+            if number:
+                # '0 hours' is no duration, so it cannot complete a booking
+                if 'hours' not in slots and int(number) > 0:
+                    slots['hours'] = int(number)
+                continue
+            kind, value = (self._phrases.get(phrase)
+                           or self._phrases[' '.join(_WORD.findall(phrase))])
+            if kind == 'keyword':
+                keywords.add(value)
+            elif kind not in slots:
+                slots[kind] = value
+        return self._resolve(keywords, slots)
@@ -1,10 +1,17 @@
 import pickle
-import xgboost as xgb
+import json
 import os
 
+import xgboost as xgb
+
 
-def convert_model(input_path, output_path):
-    """Convert old XGBoost model to new format"""
+def convert_model(input_path, output_base):
+    """Convert a pickled XGBoost model to native Booster files
+
+    Writes ``<output_base>.ubj`` (compact binary JSON, fastest to load) and
+    returns the manifest entry describing it (None on failure). A ``.json``
+    file listed in the manifest by hand is loaded the same way.
+    """
     try:
         print(f"Loading model from: {input_path}")
 
@@ -20,72 +27,65 @@ def convert_model(input_path, output_path):
             model = loaded_data
             feature_names = None
 
-        # Get booster and save in new format
-        booster = model.get_booster()
+        if hasattr(model, 'feature_names_in_'):
+            feature_names = list(model.feature_names_in_)
 
-        # Save booster in JSON format (more compatible)
-        json_path = output_path.replace('.pkl', '.json')
-        booster.save_model(json_path)
-        print(f"✅ Saved JSON model: {json_path}")
-
-        # Also create a new pickle with CPU settings
-        new_model = xgb.XGBRegressor()
-        new_model._Booster = booster
-        new_model.set_params(
-            tree_method='hist',
-            predictor='cpu_predictor'
-        )
-
-        # Save with feature names if available
-        if feature_names:
-            save_data = {
-                'model': new_model,
-                'feature_names': feature_names
-            }
-        else:
-            save_data = new_model
+        # Get booster and save in the native format (no pickle needed to load)
+        booster = model.get_booster()
+        feature_names = feature_names or booster.feature_names
 
-        with open(output_path, 'wb') as f:
-            pickle.dump(save_data, f)
+        ubj_path = f"{output_base}.ubj"
+        booster.save_model(ubj_path)
+        print(f"✅ Saved UBJ model: {ubj_path}")
 
-        print(f"✅ Converted model saved: {output_path}")
-        return True
+        return {
+            'files': [os.path.basename(ubj_path)],
+            'pickle': os.path.basename(input_path),
+            # Another xgboost can misread the file (e.g. base_score), so
+            # model_loader only loads it under this exact version
+            'xgboost_version': xgb.__version__,
+            'feature_names': list(feature_names) if feature_names else None
+        }
 
     except Exception as e:
         print(f"❌ Error converting {input_path}: {e}")
         import traceback
         traceback.print_exc()
-        return False
+        return None
 
 
 # Convert both models
 print("="*60)
-print("Converting XGBoost Models to Compatible Format")
+print("Converting XGBoost Models to Native Booster Format")
 print("="*60)
 
 models_dir = 'models'
 os.makedirs(models_dir, exist_ok=True)
 
+manifest = {}
+
 # Convert day model
-day_success = convert_model(
+manifest['day'] = convert_model(
     os.path.join(models_dir, 'xgb_day_model.pkl'),
-    os.path.join(models_dir, 'xgb_day_model_new.pkl')
+    os.path.join(models_dir, 'xgb_day_model')
 )
 
 # Convert hour model
-hour_success = convert_model(
+manifest['hour'] = convert_model(
     os.path.join(models_dir, 'xgb_hour_model.pkl'),
-    os.path.join(models_dir, 'xgb_hour_model_new.pkl')
+    os.path.join(models_dir, 'xgb_hour_model')
 )
 
-if day_success and hour_success:
+if manifest['day'] and manifest['hour']:
+    # Sidecar manifest read by model_loader.py
+    manifest_path = os.path.join(models_dir, 'manifest.json')
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    print(f"✅ Wrote manifest: {manifest_path}")
+
     print("\n✅ All models converted successfully!")
-    print("\nNext steps:")
-    print("1. Backup old models:")
-    print("   mv models/xgb_day_model.pkl models/xgb_day_model_old.pkl")
-    print("   mv models/xgb_hour_model.pkl models/xgb_hour_model_old.pkl")
-    print("2. Rename new models:")
-    print("   mv models/xgb_day_model_new.pkl models/xgb_day_model.pkl")
-    print("   mv models/xgb_hour_model_new.pkl models/xgb_hour_model.pkl")
+    print("\nThe API now loads the native files; the .pkl files are only")
+    print("used as a fallback (or with MODEL_FORMAT=pickle).")
 else:
     print("\n❌ Some models failed to convert. Check errors above.")
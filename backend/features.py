@@ -0,0 +1,257 @@
+"""
+Feature engineering for the day/hour models.
+
+Turns prediction requests into the model's input features, either one
+request at a time (``row_features``) or column-wise over many requests
+(``columnar_features`` / ``feature_matrix``) for the batch and forecast
+endpoints. Both paths use the same lookup tables and formulas, so they
+produce identical feature values. Invalid input raises FeatureError.
+
+``holiday`` (and so ``workingday``) is set when the request says so
+(``isHoliday``) or when the date is a public holiday in the request's
+``city`` according to the holiday calendar (national holidays when the
+city is missing or unknown).
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+from holiday_calendar import EPOCH, HolidayCalendar
+
+SEASON_MAP = {
+    'spring': 1, 'summer': 2, 'fall': 3, 'autumn': 3, 'winter': 4
+}
+WEATHER_MAP = {
+    'clear': 1, 'cloudy': 2, 'mist': 2, 'rainy': 3,
+    'light_rain': 3, 'heavy_rain': 4, 'storm': 4
+}
+
+# Request defaults for missing fields
+DEFAULT_SEASON = 'summer'
+DEFAULT_WEATHER = 'clear'
+DEFAULT_TEMPERATURE = 20
+DEFAULT_HUMIDITY = 50
+DEFAULT_WIND_SPEED = 10
+DEFAULT_HOUR = 12
+
+
+HOLIDAYS = HolidayCalendar.load()
+
+
+class FeatureError(ValueError):
+    """Request inputs that cannot be turned into features"""
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """'YYYY-MM-DD' string to a date (memoized; raises FeatureError)"""
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise FeatureError(f"Invalid date {date_str!r}, expected YYYY-MM-DD") from None
+
+
+@lru_cache(maxsize=4096)
+def day_number(date_str):
+    """Days since 1970-01-01 (the integer value of ``datetime64[D]``)"""
+    return (parse_date(date_str) - EPOCH).days
+
+
+@lru_cache(maxsize=4096)
+def calendar(date_str):
+    """(yr, mnth, weekday, workingday) for a 'YYYY-MM-DD' date
+
+    ``workingday`` here ignores holidays; callers clear it for holidays.
+    """
+    day = parse_date(date_str)
+    weekday = day.weekday()
+    return int(day.year >= 2012), day.month, weekday, int(weekday < 5)
+
+
+def _date(data, today):
+    """The request's 'date' (today if absent), checked before the cached parsers"""
+    value = data.get('date') or today
+    if not isinstance(value, str):
+        # Lists and dicts are unhashable and would fail inside lru_cache
+        raise FeatureError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+    return value
+
+
+def _number(data, key, default):
+    value = data.get(key, default)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise FeatureError(f"{key} must be a number, got {value!r}") from None
+
+
+def _category(data, key, default, mapping, fallback):
+    value = data.get(key, default)
+    if not isinstance(value, str):
+        raise FeatureError(f"{key} must be a string, got {value!r}")
+    return mapping.get(value.lower(), fallback)
+
+
+def row_features(data, prediction_type='day'):
+    """Feature dict for one prediction request (raises FeatureError)"""
+    date_str = _date(data, date.today().isoformat())
+    yr, month, weekday, workingday = calendar(date_str)
+
+    temp = (_number(data, 'temperature', DEFAULT_TEMPERATURE) + 10) / 50
+    windspeed = _number(data, 'windSpeed', DEFAULT_WIND_SPEED) / 67
+    holiday = 1 if data.get('isHoliday', False) or \
+        HOLIDAYS.is_holiday(day_number(date_str), data.get('city')) else 0
+
+    features = {
+        'season': _category(data, 'season', DEFAULT_SEASON, SEASON_MAP, 2),
+        'yr': yr,
+        'mnth': month,
+        'holiday': holiday,
+        'weekday': weekday,
+        'workingday': 0 if holiday else workingday,
+        'weathersit': _category(data, 'weather', DEFAULT_WEATHER, WEATHER_MAP, 1),
+        'temp': temp,
+        'atemp': temp - (windspeed * 0.05),
+        'hum': _number(data, 'humidity', DEFAULT_HUMIDITY) / 100,
+        'windspeed': windspeed
+    }
+
+    if prediction_type == 'hour':
+        features['hr'] = int(_number(data, 'hour', DEFAULT_HOUR))
+
+    return features
+
+
+def map_categories(values, mapping, fallback):
+    """Vectorized ``mapping.get(str(v).lower(), fallback)``"""
+    values = np.asarray(values, dtype=object)
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    codes = np.array([mapping.get(u.lower(), fallback) for u in uniques], dtype=np.int64)
+    return codes[inverse].reshape(values.shape)
+
+
+def calendar_columns(days):
+    """(year, month, weekday) arrays for a ``datetime64[D]`` array"""
+    days = np.asarray(days, dtype='datetime64[D]')
+    year = days.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = days.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    return year, month, weekday
+
+
+def derive_columns(year, month, weekday, season, weathersit, holiday,
+                   temp_celsius, humidity, wind_speed, hour=None):
+    """Column-wise equivalent of row_features (all arguments are NumPy arrays)"""
+    temp = (temp_celsius + 10) / 50
+    windspeed = wind_speed / 67
+    columns = {
+        'season': season,
+        'yr': (year >= 2012).astype(np.int64),
+        'mnth': month,
+        'holiday': holiday,
+        'weekday': weekday,
+        'workingday': ((weekday < 5) & (holiday == 0)).astype(np.int64),
+        'weathersit': weathersit,
+        'temp': temp,
+        'atemp': temp - (windspeed * 0.05),
+        'hum': humidity / 100,
+        'windspeed': windspeed
+    }
+    if hour is not None:
+        columns['hr'] = hour
+    return columns
+
+
+def holiday_mask(days, city=None):
+    """Calendar holidays for a ``datetime64[D]`` array; ``city`` is one
+    city for all days or an array with one city per day"""
+    if city is None or isinstance(city, str):
+        return HOLIDAYS.mask(days, city)
+    city = np.asarray(city, dtype=object)
+    mask = np.zeros(len(days), dtype=bool)
+    for name in set(city.tolist()):
+        rows = city == name
+        mask[rows] = HOLIDAYS.mask(days[rows], name)
+    return mask
+
+
+def columnar_features(days, season, weather, temperature, humidity, wind_speed,
+                      is_holiday, hour=None, city=None):
+    """Feature columns from arrays of raw request inputs
+
+    ``days`` is a ``datetime64[D]`` array, ``season``/``weather`` hold the
+    request's category names and the rest are numeric (or boolean) arrays.
+    ``city`` (one name or one per row) selects the holiday calendar.
+    """
+    days = np.asarray(days, dtype='datetime64[D]')
+    year, month, weekday = calendar_columns(days)
+    holiday = np.asarray(is_holiday).astype(bool) | holiday_mask(days, city)
+    return derive_columns(
+        year, month, weekday,
+        map_categories(season, SEASON_MAP, 2),
+        map_categories(weather, WEATHER_MAP, 1),
+        holiday.astype(np.int64),
+        np.asarray(temperature, dtype=np.float64),
+        np.asarray(humidity, dtype=np.float64),
+        np.asarray(wind_speed, dtype=np.float64),
+        None if hour is None else np.asarray(hour).astype(np.int64))
+
+
+def columns_to_matrix(columns, feature_names):
+    """Lay out feature columns in model order, zero-filling unknown features"""
+    n = len(next(iter(columns.values())))
+    matrix = np.zeros((n, len(feature_names)), dtype=np.float32)
+    for j, name in enumerate(feature_names):
+        if name in columns:
+            matrix[:, j] = columns[name]
+    return matrix
+
+
+def feature_matrix(rows, feature_names, prediction_type='day'):
+    """Feature matrix for a list of request payloads
+
+    Raw inputs are validated and collected in one pass, then the features
+    are computed column-wise. Returns ``(matrix, valid)`` where ``valid``
+    masks out rows that raised FeatureError (those rows are zero-filled).
+    """
+    n = len(rows)
+    valid = np.ones(n, dtype=bool)
+    inputs = []  # one tuple of raw inputs per row, converted column-wise below
+    placeholder = (0, DEFAULT_SEASON, DEFAULT_WEATHER, 0.0, 0.0, 0.0,
+                   False, 0, None)
+
+    today = date.today().isoformat()
+    hourly = prediction_type == 'hour'
+    for i, data in enumerate(rows):
+        try:
+            season = data.get('season', DEFAULT_SEASON)
+            weather = data.get('weather', DEFAULT_WEATHER)
+            if not isinstance(season, str) or not isinstance(weather, str):
+                raise FeatureError('season and weather must be strings')
+            inputs.append((
+                day_number(_date(data, today)),
+                season,
+                weather,
+                _number(data, 'temperature', DEFAULT_TEMPERATURE),
+                _number(data, 'humidity', DEFAULT_HUMIDITY),
+                _number(data, 'windSpeed', DEFAULT_WIND_SPEED),
+                bool(data.get('isHoliday', False)),
+                int(_number(data, 'hour', DEFAULT_HOUR)) if hourly else 0,
+                data.get('city') if isinstance(data.get('city'), str) else None
+            ))
+        except (FeatureError, AttributeError):
+            valid[i] = False
+            inputs.append(placeholder)
+
+    days, season, weather, temperature, humidity, wind_speed, holiday, hour, city = \
+        zip(*inputs) if inputs else ((),) * 9
+    columns = columnar_features(
+        np.array(days, dtype=np.int64).astype('datetime64[D]'), season, weather,
+        temperature, humidity, wind_speed, holiday, hour if hourly else None, city)
+
+    matrix = columns_to_matrix(columns, feature_names)
+    matrix[~valid] = 0
+
+    return matrix, valid
@@ -0,0 +1,41 @@
+"""
+Gunicorn settings for the BikeRental AI backend.
+
+Picked up automatically when gunicorn is started from this directory.
+Bind address and worker count keep gunicorn's defaults ($PORT and
+$WEB_CONCURRENCY are honoured as usual).
+
+PRELOAD_MODELS=1 (or ``--preload``) imports the app in the master so
+both XGBoost boosters are loaded once and shared copy-on-write by every
+forked worker instead of each worker loading its own copy.
+"""
+
+import gc
+import os
+
+preload_app = os.getenv('PRELOAD_MODELS', '0') == '1'
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+
+    import app
+
+    # Load eagerly even with LAZY_MODEL_LOADING so workers inherit the
+    # boosters. No prediction runs here: OpenMP state must not be forked,
+    # so the INFERENCE_ENGINE=numpy parity check waits for post_fork.
+    app.model_registry.load_all(check_engine=False)
+
+    # Move everything allocated so far out of the GC's reach so collections
+    # in the workers do not write to (and un-share) the inherited pages.
+    gc.collect()
+    gc.freeze()
+    server.log.info("Models preloaded in master: %s", app.model_registry.version)
+
+
+def post_fork(server, worker):
+    import app
+
+    # The first XGBoost prediction, in the worker rather than the master
+    app.model_registry.check_engines()
@@ -0,0 +1,98 @@
+"""
+In-memory holiday calendar for the cities we serve.
+
+Loaded once from ``data/holidays.json``. Every city gets its own index of
+epoch day numbers (days since 1970-01-01, the integer value of NumPy's
+``datetime64[D]``) with the national holidays merged in, so a single date
+is a dict lookup, a date range is a bisect over the sorted days and a
+whole array of dates is one ``np.isin``.
+"""
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+import numpy as np
+
+HOLIDAYS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'data', 'holidays.json')
+
+EPOCH = date(1970, 1, 1)
+
+
+def to_day_number(value):
+    """Epoch day number for a date or 'YYYY-MM-DD' string"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return (value - EPOCH).days
+
+
+class HolidayCalendar:
+    """National and per-city holidays indexed by epoch day number"""
+
+    def __init__(self, national, cities, years):
+        first_year, last_year = years
+        national_days = self._expand(national, first_year, last_year)
+
+        # Keyed by lower-case city; None is the national-only calendar
+        self._index = {None: national_days}
+        self.cities = sorted(cities)
+        for city, entries in cities.items():
+            days = dict(national_days)
+            days.update(self._expand(entries, first_year, last_year))
+            self._index[city.lower()] = days
+
+        self._sorted = {key: np.array(sorted(days), dtype=np.int64)
+                        for key, days in self._index.items()}
+
+    @staticmethod
+    def _expand(entries, first_year, last_year):
+        days = {}
+        for month_day, name in entries.get('fixed', {}).items():
+            month, day = (int(part) for part in month_day.split('-'))
+            for year in range(first_year, last_year + 1):
+                days[to_day_number(date(year, month, day))] = name
+        for iso_date, name in entries.get('dates', {}).items():
+            days[to_day_number(iso_date)] = name
+        return days
+
+    @classmethod
+    def load(cls, path=HOLIDAYS_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get('national', {}), data.get('cities', {}),
+                   data.get('years', (2011, date.today().year + 1)))
+
+    def _key(self, city):
+        # Unknown cities fall back to the national holidays
+        key = city.lower() if isinstance(city, str) else None
+        return key if key in self._index else None
+
+    def knows(self, city):
+        return isinstance(city, str) and city.lower() in self._index
+
+    def holiday_name(self, day, city=None):
+        """Holiday name for a date / day number, or None (O(1))"""
+        if not isinstance(day, (int, np.integer)):
+            day = to_day_number(day)
+        return self._index[self._key(city)].get(int(day))
+
+    def is_holiday(self, day, city=None):
+        return self.holiday_name(day, city) is not None
+
+    def between(self, start, end, city=None):
+        """[(date, name)] for the holidays from ``start`` to ``end`` inclusive"""
+        key = self._key(city)
+        days = self._sorted[key]
+        lo = bisect_left(days, to_day_number(start))
+        hi = bisect_right(days, to_day_number(end))
+        return [(EPOCH + timedelta(days=int(d)), self._index[key][int(d)])
+                for d in days[lo:hi]]
+
+    def mask(self, days, city=None):
+        """Boolean holiday mask for a ``datetime64[D]`` (or day number) array"""
+        days = np.asarray(days)
+        if days.dtype.kind == 'M':
+            days = days.astype('datetime64[D]').astype(np.int64)
+        return np.isin(days, self._sorted[self._key(city)])
@@ -0,0 +1,306 @@
+"""
+Bike inventory and booking availability.
+
+The fleet (bikes per city and bike type) comes from ``data/fleet.json``:
+a city's own counts override the ``default`` counts per bike type, and
+bike types in neither are not tracked (always bookable, as before).
+
+Every booking occupies one bike over the half-open interval
+[start, start + duration) in minutes since 1970-01-01. Each process keeps
+an IntervalIndex of those intervals per (city, bike type): sorted start
+and end lists, so "how many are out at T" is two bisects and the peak
+over a booking's interval is one more per booking starting inside it.
+
+Bookings and cancellations also append +1/-1 rows to ``booking_events``
+in the same transaction. Before answering, an index replays the events
+it has not seen yet, so every gunicorn worker sees the others' bookings.
+``book`` checks and inserts inside ``BEGIN IMMEDIATE``: SQLite's write
+lock serializes bookers across threads and processes, so two requests
+can never both take the last bike.
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, time
+
+FLEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'data', 'fleet.json')
+
+CANCELLED = 'cancelled'
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Far beyond any rental; keeps interval ends within SQLite's integers
+MAX_DURATION_HOURS = 24 * 366
+
+BOOKING_INSERT_SQL = (
+    'INSERT INTO bookings (user_email, city, bike_type, duration, date, '
+    'start_time, total_price, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+
+
+class Unavailable(Exception):
+    """No bike of the requested type is free for the whole booking"""
+
+    def __init__(self, city, bike_type, free):
+        super().__init__(f'No {bike_type} available in {city} for that time')
+        self.free = free
+
+
+def booking_interval(day, start_time, duration):
+    """[start, end) minutes since the epoch; ValueError if unparseable"""
+    try:
+        start = time.fromisoformat(start_time)
+        minutes = ((date.fromisoformat(day).toordinal() - EPOCH_ORDINAL) * 1440
+                   + start.hour * 60 + start.minute)
+        hours = float(duration)
+    except (TypeError, OverflowError) as e:
+        raise ValueError(str(e)) from None
+    # Also rejects 'inf', '1e400' and 'nan', which float() accepts
+    if not 0 < hours <= MAX_DURATION_HOURS:
+        raise ValueError(f'duration must be between 0 and {MAX_DURATION_HOURS} hours')
+    length = round(hours * 60)
+    if length <= 0:
+        raise ValueError('duration must be positive')
+    return minutes, minutes + length
+
+
+def _key(city, bike_type):
+    return city.strip().lower(), bike_type.strip().lower()
+
+
+class IntervalIndex:
+    """Half-open intervals per key, counted with bisect (not thread-safe)"""
+
+    def __init__(self):
+        self._starts = {}  # key -> sorted interval starts
+        self._ends = {}    # key -> sorted interval ends
+
+    def add(self, key, start, end):
+        insort(self._starts.setdefault(key, []), start)
+        insort(self._ends.setdefault(key, []), end)
+
+    def remove(self, key, start, end):
+        for values, value in ((self._starts.get(key), start), (self._ends.get(key), end)):
+            if values:
+                i = bisect_left(values, value)
+                if i < len(values) and values[i] == value:
+                    del values[i]
+
+    def active_at(self, key, at):
+        """Intervals with start <= at < end (O(log n))"""
+        starts = self._starts.get(key)
+        if not starts:
+            return 0
+        return bisect_right(starts, at) - bisect_right(self._ends[key], at)
+
+    def peak(self, key, start, end):
+        """Most intervals active at once within [start, end)
+
+        The count only rises where an interval starts, so it is enough to
+        look at ``start`` and every start inside the range.
+        """
+        starts = self._starts.get(key)
+        if not starts:
+            return 0
+        peak = self.active_at(key, start)
+        for at in starts[bisect_right(starts, start):bisect_left(starts, end)]:
+            peak = max(peak, self.active_at(key, at))
+        return peak
+
+    def __len__(self):
+        return sum(map(len, self._starts.values()))
+
+
+class Inventory:
+    """Fleet sizes plus a synced interval index of the bookings"""
+
+    def __init__(self, connect, fleet, default=None, retention_hours=24):
+        self.connect = connect
+        self.retention_hours = retention_hours
+        default = default or {}
+        self._default = {bike.lower(): count for bike, count in default.items()}
+        self._fleet = {city.lower(): {bike.lower(): count for bike, count in bikes.items()}
+                       for city, bikes in fleet.items()}
+        self._names = {bike.lower(): bike for bikes in [default, *fleet.values()]
+                       for bike in bikes}
+        self._index = IntervalIndex()
+        self._seq = None  # last booking_events row applied; None until built
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, connect, path=FLEET_PATH, **kwargs):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(connect, data.get('cities', {}), data.get('default', {}), **kwargs)
+
+    @staticmethod
+    def create_table(cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS booking_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                booking_id INTEGER NOT NULL,
+                city TEXT NOT NULL,
+                bike_type TEXT NOT NULL,
+                start_at INTEGER NOT NULL,
+                end_at INTEGER NOT NULL,
+                delta INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    def fleet_size(self, city, bike_type):
+        """Bikes of this type in the city, or None if not tracked"""
+        city_key, bike_key = _key(city, bike_type)
+        count = self._fleet.get(city_key, {}).get(bike_key)
+        return self._default.get(bike_key) if count is None else count
+
+    def bike_types(self, city):
+        """Tracked bike types in a city, as written in the fleet file"""
+        keys = set(self._default) | set(self._fleet.get(city.strip().lower(), {}))
+        return sorted(self._names[key] for key in keys)
+
+    def _rebuild(self, conn):
+        index = IntervalIndex()
+        for city, bike_type, day, start_time, duration in conn.execute(
+                'SELECT city, bike_type, date, start_time, duration FROM bookings '
+                'WHERE status IS NULL OR status != ?', (CANCELLED,)):
+            try:
+                index.add(_key(city, bike_type), *booking_interval(day, start_time, duration))
+            except (AttributeError, ValueError):
+                continue  # unparseable legacy row; it never held a bike
+        self._index = index
+        self._seq = conn.execute(
+            'SELECT COALESCE(MAX(seq), 0) FROM booking_events').fetchone()[0]
+
+    def sync(self, conn):
+        """Apply the booking events other connections have committed"""
+        with self._lock:
+            if self._seq is None:
+                self._rebuild_snapshot(conn)
+                return
+            rows = conn.execute(
+                'SELECT seq, city, bike_type, start_at, end_at, delta FROM booking_events '
+                'WHERE seq > ? ORDER BY seq', (self._seq,)).fetchall()
+            if rows and rows[0][0] != self._seq + 1:
+                # Events we never saw were pruned: start over from the bookings
+                self._rebuild_snapshot(conn)
+                return
+            for seq, city, bike_type, start, end, delta in rows:
+                if delta > 0:
+                    self._index.add(_key(city, bike_type), start, end)
+                else:
+                    self._index.remove(_key(city, bike_type), start, end)
+                self._seq = seq
+
+    def _rebuild_snapshot(self, conn):
+        # Bookings and the last event seq have to come from one snapshot
+        if conn.in_transaction:
+            self._rebuild(conn)
+            return
+        conn.execute('BEGIN')
+        try:
+            self._rebuild(conn)
+        finally:
+            conn.rollback()
+
+    def _free(self, key, fleet, start, end):
+        if end is None:
+            return fleet - self._index.active_at(key, start)
+        return fleet - self._index.peak(key, start, end)
+
+    def free(self, city, bike_type, start, end=None):
+        """Bikes free at minute ``start``, or for all of [start, end)
+
+        None when the bike type is not tracked for the city.
+        """
+        fleet = self.fleet_size(city, bike_type)
+        if fleet is None:
+            return None
+        conn = self.connect()
+        try:
+            self.sync(conn)
+            with self._lock:
+                return max(0, self._free(_key(city, bike_type), fleet, start, end))
+        finally:
+            conn.close()
+
+    def book(self, conn, user_email, city, bike_type, duration, day, start_time,
+             total_price, status='confirmed'):
+        """Insert a booking if a bike is free for its whole interval
+
+        Returns the booking id; raises Unavailable when the fleet is fully
+        booked at some point of the interval and ValueError when the date,
+        time or duration cannot be read. The check and the insert happen in
+        one BEGIN IMMEDIATE transaction.
+        """
+        start, end = booking_interval(day, start_time, duration)
+        fleet = self.fleet_size(city, bike_type)
+        holds_bike = status != CANCELLED
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.sync(conn)
+            if holds_bike and fleet is not None:
+                with self._lock:
+                    free = self._free(_key(city, bike_type), fleet, start, end)
+                if free <= 0:
+                    raise Unavailable(city, bike_type, max(0, free))
+
+            cursor = conn.execute(
+                BOOKING_INSERT_SQL,
+                (user_email, city, bike_type, duration, day, start_time, total_price, status))
+            booking_id = cursor.lastrowid
+            if holds_bike:
+                self._record(conn, booking_id, city, bike_type, start, end, 1)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+        self.sync(conn)
+        return booking_id
+
+    def cancel(self, conn, booking_id):
+        """Delete a booking and free its bike; False if there is no such booking"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT city, bike_type, date, start_time, duration, status '
+                'FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return False
+            city, bike_type, day, start_time, duration, status = tuple(row)
+            conn.execute('DELETE FROM bookings WHERE id = ?', (booking_id,))
+            if status != CANCELLED:
+                try:
+                    start, end = booking_interval(day, start_time, duration)
+                except (TypeError, ValueError):
+                    pass  # never indexed
+                else:
+                    self._record(conn, booking_id, city, bike_type, start, end, -1)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+        self.sync(conn)
+        return True
+
+    def _record(self, conn, booking_id, city, bike_type, start, end, delta):
+        conn.execute(
+            'INSERT INTO booking_events (booking_id, city, bike_type, start_at, end_at, delta) '
+            'VALUES (?, ?, ?, ?, ?, ?)', (booking_id, city, bike_type, start, end, delta))
+        # Events are in created_at order, so the old ones are a seq range.
+        # The one just added always survives: a process that missed pruned
+        # events sees the gap before it and rebuilds.
+        conn.execute(
+            'DELETE FROM booking_events WHERE seq < ('
+            "SELECT seq FROM booking_events WHERE created_at >= datetime('now', ?) "
+            'ORDER BY seq LIMIT 1)', (f'-{self.retention_hours} hours',))
+
+    def stats(self):
+        with self._lock:
+            return {'bookings_indexed': len(self._index), 'last_event': self._seq}
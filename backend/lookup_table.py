@@ -0,0 +1,213 @@
+"""
+Precomputed prediction grid for the day/hour models.
+
+Every discrete model input (season, yr, mnth, hr, holiday, weekday,
+weathersit) is enumerated, the continuous inputs (temperature, humidity,
+wind speed) are sampled on a grid, and the model is scored once for
+every cell. Serving a prediction is then an index computation plus a
+trilinear interpolation over the 8 surrounding cells, independent of the
+number of trees. atemp and workingday are derived from the other inputs,
+so they need no axis of their own.
+
+Tables are built offline by build_lookup_table.py and stored next to the
+models as ``<name>.npy`` (the grid, memory-mapped on load so gunicorn
+workers share it) plus ``<name>.json`` (axes, model hash, measured error).
+"""
+
+import json
+import os
+from bisect import bisect_right
+
+import numpy as np
+
+# API-side domain of each discrete input, in grid order
+DISCRETE_AXES = {
+    'season': (1, 2, 3, 4),
+    'yr': (0, 1),
+    'mnth': tuple(range(1, 13)),
+    'hr': tuple(range(24)),
+    'holiday': (0, 1),
+    'weekday': tuple(range(7)),
+    'weathersit': (1, 2, 3, 4)
+}
+
+# Continuous axes in request units (°C, %, km/h) per model. The day
+# model splits every degree between about -3 and 32 °C (and densely on
+# 29-96 % humidity and 3-28 km/h wind), so anything coarser there misses
+# whole steps; past its outermost splits the model is flat. No hour grid
+# of a practical size gets its error down that far, so the hour axes
+# stay coarse.
+DEFAULT_CONTINUOUS_AXES = {
+    'day': {
+        'temperature': (-10, *range(-4, 35), 50),
+        'humidity': (0, *range(28, 99, 2), 100),
+        'windSpeed': (0, *range(2, 31), 67)
+    },
+    'hour': {
+        'temperature': tuple(range(-10, 51, 5)),
+        'humidity': (0, 20, 40, 60, 80, 100),
+        'windSpeed': (0, 10, 20, 35, 67)
+    }
+}
+
+# Model feature that each continuous request field becomes
+CONTINUOUS_FEATURES = {'temperature': 'temp', 'humidity': 'hum', 'windSpeed': 'windspeed'}
+
+BUILD_CHUNK_ROWS = 1_000_000
+
+
+def lookup_paths(kind, models_dir='models'):
+    base = os.path.join(models_dir, f'xgb_{kind}_lookup')
+    return f'{base}.npy', f'{base}.json'
+
+
+class LookupTable:
+    """Grid of precomputed predictions with O(1) interpolated lookups"""
+
+    def __init__(self, grid, discrete, continuous, meta):
+        self.grid = grid
+        self.flat = grid.reshape(-1)
+        self.meta = meta
+        self.model_sha256 = meta['model_sha256']
+        self.error = meta.get('error', {})
+
+        # (feature, {value: index}, stride) / (feature, axis values, stride)
+        strides = np.cumprod((1,) + grid.shape[:0:-1])[::-1]
+        self._discrete = [
+            (name, {v: i for i, v in enumerate(values)}, int(stride))
+            for (name, values), stride in zip(discrete.items(), strides)]
+        self._continuous = [
+            (name, [float(v) for v in axis], int(stride))
+            for (name, axis), stride in zip(continuous.items(), strides[len(discrete):])]
+
+    @classmethod
+    def load(cls, kind, models_dir='models'):
+        """Load a built table (None if there is none)"""
+        grid_path, meta_path = lookup_paths(kind, models_dir)
+        if not (os.path.exists(grid_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        grid = np.load(grid_path, mmap_mode='r')
+        return cls(grid, meta['discrete_axes'], meta['continuous_axes'], meta)
+
+    def predict(self, features):
+        """Interpolated prediction for a feature dict (None if out of the grid)"""
+        offset = 0
+        for name, index, stride in self._discrete:
+            i = index.get(features.get(name))
+            if i is None:
+                return None
+            offset += i * stride
+
+        corners = [(offset, 1.0)]
+        for name, axis, stride in self._continuous:
+            x = features.get(name)
+            if x is None or not axis[0] <= x <= axis[-1]:
+                return None
+            j = min(bisect_right(axis, x), len(axis) - 1) - 1
+            t = (x - axis[j]) / (axis[j + 1] - axis[j])
+            corners = [
+                (o + (j + step) * stride, w * (t if step else 1.0 - t))
+                for o, w in corners for step in (0, 1)]
+
+        flat = self.flat
+        return float(sum(w * float(flat[o]) for o, w in corners if w))
+
+
+def build_lookup_table(model, derive_columns, to_matrix, continuous_axes=None,
+                       validation_rows=20000, seed=0):
+    """Score the full grid for ``model`` and measure its interpolation error
+
+    ``derive_columns`` maps raw inputs to feature columns (as
+    features.derive_columns) and ``to_matrix`` lays them out in model
+    order. ``continuous_axes`` defaults to the model kind's
+    DEFAULT_CONTINUOUS_AXES. Returns ``(grid, meta)``.
+    """
+    continuous_axes = continuous_axes or DEFAULT_CONTINUOUS_AXES[model.kind]
+    discrete = {name: values for name, values in DISCRETE_AXES.items()
+                if name in model.features}
+    raw_axes = [np.asarray(v, dtype=np.float64) for v in discrete.values()] + \
+               [np.asarray(v, dtype=np.float64) for v in continuous_axes.values()]
+    shape = tuple(len(axis) for axis in raw_axes)
+    n_cells = int(np.prod(shape))
+
+    def derive(values):
+        return derive_columns(
+            year=2011 + values['yr'].astype(np.int64),
+            month=values['mnth'].astype(np.int64),
+            weekday=values['weekday'].astype(np.int64),
+            season=values['season'].astype(np.int64),
+            weathersit=values['weathersit'].astype(np.int64),
+            holiday=values['holiday'].astype(np.int64),
+            temp_celsius=values['temperature'],
+            humidity=values['humidity'],
+            wind_speed=values['windSpeed'],
+            hour=values['hr'].astype(np.int64) if 'hr' in values else None)
+
+    # Continuous axes in feature units, as the lookup sees them
+    feature_axes = {}
+    for name, axis in continuous_axes.items():
+        points = {other: np.full(len(axis), float(values[0]))
+                  for other, values in {**DISCRETE_AXES, **continuous_axes}.items()}
+        points[name] = np.asarray(axis, dtype=np.float64)
+        feature = CONTINUOUS_FEATURES[name]
+        feature_axes[feature] = derive(points)[feature].tolist()
+
+    names = list(discrete) + list(continuous_axes)
+    grid = np.empty(n_cells, dtype=np.float32)
+    for start in range(0, n_cells, BUILD_CHUNK_ROWS):
+        cells = np.arange(start, min(start + BUILD_CHUNK_ROWS, n_cells))
+        indices = np.unravel_index(cells, shape)
+        values = {name: axis[i] for name, axis, i in zip(names, raw_axes, indices)}
+        grid[cells] = model.predict(to_matrix(derive(values), model.features))
+        print(f"   scored {cells[-1] + 1:,}/{n_cells:,} cells")
+
+    # float16 rounds to 11 significant bits (under 0.05%, and part of the
+    # error measured below), which halves the size of the table
+    dtype = np.float16 if np.abs(grid).max() < np.finfo(np.float16).max else np.float32
+    grid = grid.astype(dtype).reshape(shape)
+
+    meta = {
+        'model_sha256': model.sha256,
+        'dtype': np.dtype(dtype).name,
+        'discrete_axes': {name: list(values) for name, values in discrete.items()},
+        'continuous_axes': feature_axes,
+        'request_axes': {name: list(values) for name, values in continuous_axes.items()}
+    }
+    table = LookupTable(grid, meta['discrete_axes'], meta['continuous_axes'], meta)
+
+    # Error against the live model on random in-range requests, with the
+    # continuous inputs as whole numbers like the frontend sends them
+    rng = np.random.default_rng(seed)
+    sample = {name: rng.choice(np.asarray(values), validation_rows)
+              for name, values in discrete.items()}
+    for name, values in continuous_axes.items():
+        sample[name] = rng.integers(min(values), max(values) + 1,
+                                    validation_rows).astype(np.float64)
+    columns = derive(sample)
+    expected = model.predict(to_matrix(columns, model.features))
+    keys = list(discrete) + list(feature_axes)
+    actual = np.array([
+        table.predict({k: columns[k][i].item() for k in keys})
+        for i in range(validation_rows)])
+    errors = np.abs(actual - expected)
+    p99 = float(np.percentile(errors, 99))
+    meta['error'] = {
+        'rows': validation_rows,
+        'mean_prediction': round(float(np.mean(expected)), 3),
+        'p99_relative': round(p99 / max(float(np.mean(np.abs(expected))), 1.0), 4),
+        'mean': round(float(errors.mean()), 3),
+        'p99': round(p99, 3),
+        'max': round(float(errors.max()), 3)
+    }
+    return grid, meta
+
+
+def save_lookup_table(kind, grid, meta, models_dir='models'):
+    grid_path, meta_path = lookup_paths(kind, models_dir)
+    np.save(grid_path, grid)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+        f.write('\n')
+    return grid_path, meta_path
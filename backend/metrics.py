@@ -0,0 +1,149 @@
+"""
+Request and stage metrics in the Prometheus text format.
+
+``Metrics.install(app)`` adds request hooks that count and time every
+request by route template, method and status. ``metrics.stage(name)``
+times one piece of work inside a request (feature build, model predict,
+DB write, ...). ``render()`` returns both as Prometheus exposition text
+for ``/api/metrics``.
+
+Counters live in the process that recorded them: behind gunicorn every
+worker keeps (and reports) its own, so scrape each worker or sum them.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, request
+
+# Seconds; fine-grained at the low end for sub-millisecond stages
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Bucket counts, sum and count of observed values (not thread-safe)"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, bucket, value):
+        self.counts[bucket] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        histogram = Histogram.__new__(Histogram)
+        histogram.counts, histogram.sum, histogram.count = \
+            list(self.counts), self.sum, self.count
+        return histogram
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class Metrics:
+    """Per-route request counts/latencies plus named stage timings"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._requests = {}  # (route, method, status) -> count
+        self._latency = {}   # (route, method) -> Histogram
+        self._stages = {}    # stage -> Histogram
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(self.buckets)
+        return histogram
+
+    def observe_request(self, route, method, status, seconds):
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            key = (route, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._histogram(self._latency, (route, method)).observe(bucket, seconds)
+
+    def observe_stage(self, stage, seconds):
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._histogram(self._stages, stage).observe(bucket, seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage ``name`` (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def install(self, app):
+        """Time every request of a Flask app by route template"""
+        @app.before_request
+        def start_timer():
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            start = g.pop('request_start', None)
+            if start is not None:
+                rule = request.url_rule
+                self.observe_request(
+                    rule.rule if rule is not None else 'unmatched',
+                    request.method, response.status_code,
+                    time.perf_counter() - start)
+            return response
+
+    def _render_histogram(self, lines, name, labels, histogram):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{_labels(**labels, le=bound)}}} {cumulative}')
+        lines.append(f'{name}_sum{{{_labels(**labels)}}} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{{{_labels(**labels)}}} {histogram.count}')
+
+    def render(self):
+        """Everything recorded so far, in Prometheus text format 0.0.4"""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = sorted((key, h.copy()) for key, h in self._latency.items())
+            stages = sorted((key, h.copy()) for key, h in self._stages.items())
+
+        lines = [
+            '# HELP process_start_time_seconds When these counters started.',
+            '# TYPE process_start_time_seconds gauge',
+            f'process_start_time_seconds {self.started:.3f}',
+            '# HELP http_requests_total Requests by route, method and status code.',
+            '# TYPE http_requests_total counter'
+        ]
+        for (route, method, status), count in requests:
+            lines.append(f'http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+        lines += [
+            '# HELP http_request_duration_seconds Request latency by route and method.',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        for (route, method), histogram in latency:
+            self._render_histogram(lines, 'http_request_duration_seconds',
+                                   {'route': route, 'method': method}, histogram)
+
+        lines += [
+            '# HELP stage_duration_seconds Time spent in each stage of request handling.',
+            '# TYPE stage_duration_seconds histogram'
+        ]
+        for stage, histogram in stages:
+            self._render_histogram(lines, 'stage_duration_seconds', {'stage': stage}, histogram)
+
+        return '\n'.join(lines) + '\n'
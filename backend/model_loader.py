@@ -0,0 +1,278 @@
+"""
+Model loading for the prediction API.
+
+Prefers XGBoost's native Booster files (UBJ, then JSON) listed in the
+``models/manifest.json`` sidecar, which also records the feature order.
+The manifest also records the xgboost version that saved the native
+files. Another version can load them without an error and still read
+them wrong (e.g. base_score), so they are only used under that exact
+version. Falls back to the legacy pickled XGBRegressor files when no
+usable native file is available or it fails to load. Either way the API
+works with a plain ``xgb.Booster``.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import traceback
+
+import numpy as np
+import xgboost as xgb
+
+from tree_ensemble import TreeEnsemble
+
+MANIFEST_NAME = 'manifest.json'
+
+LEGACY_PICKLES = {
+    'day': 'xgb_day_model.pkl',
+    'hour': 'xgb_hour_model.pkl'
+}
+
+DEFAULT_FEATURES = {
+    'day': [
+        'season', 'yr', 'mnth', 'holiday', 'weekday',
+        'workingday', 'weathersit', 'temp', 'atemp', 'hum', 'windspeed'
+    ],
+    'hour': [
+        'season', 'yr', 'mnth', 'hr', 'holiday', 'weekday',
+        'workingday', 'weathersit', 'temp', 'atemp', 'hum', 'windspeed'
+    ]
+}
+
+# A compiled ensemble is only used if it matches XGBoost this closely
+ENGINE_TOLERANCE = 1e-4
+
+# Above this many rows XGBoost's multithreaded predictor is faster again
+ENSEMBLE_MAX_ROWS = 16
+
+
+class FeatureEncoder:
+    """Encode feature dicts straight into a float32 row in model column order
+
+    The row buffer is allocated once per thread and reused, so the hot path
+    never builds a DataFrame or a fresh array.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = tuple(feature_names)
+        self._local = threading.local()
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = np.zeros((1, len(self.feature_names)), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+
+    def encode(self, features):
+        """Return the shared (1, n_features) buffer filled from ``features``"""
+        buffer = self._buffer()
+        buffer[0] = [features.get(f, 0) for f in self.feature_names]
+        return buffer
+
+
+class LoadedModel:
+    """A booster together with its feature order and where it came from"""
+
+    def __init__(self, kind, booster, features, path, sha256, load_seconds,
+                 ensemble=None, ensemble_checked=True):
+        self.kind = kind
+        self.booster = booster
+        self.ensemble = ensemble
+        self._unchecked = ensemble is not None and not ensemble_checked
+        self.engine = 'numpy' if ensemble is not None else 'xgboost'
+        self.features = list(features)
+        self.encoder = FeatureEncoder(self.features)
+        self.path = path
+        self.format = os.path.splitext(path)[1].lstrip('.')
+        self.sha256 = sha256
+        self.version = sha256[:12]
+        self.load_seconds = load_seconds
+
+    def check_ensemble(self):
+        """Compare an unchecked ensemble with XGBoost; drop it if inexact"""
+        if self._unchecked:
+            if not ensemble_matches(self.kind, self.ensemble, self.booster):
+                self.ensemble = None
+                self.engine = 'xgboost'
+            self._unchecked = False
+
+    def predict(self, matrix):
+        """Score a feature matrix (compiled ensemble or inplace_predict)"""
+        if self._unchecked:
+            self.check_ensemble()
+        ensemble = self.ensemble
+        if ensemble is not None and len(matrix) <= ENSEMBLE_MAX_ROWS:
+            return ensemble.predict(matrix)
+        return self.booster.inplace_predict(np.asarray(matrix, dtype=np.float32))
+
+
+def read_manifest(models_dir):
+    """Manifest entries keyed by model kind ({} when there is no manifest)"""
+    path = os.path.join(models_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def version_mismatch(entry):
+    """Why a manifest entry's native files cannot be used here, or None"""
+    saved = entry.get('xgboost_version')
+    if saved == xgb.__version__:
+        return None
+    return f"saved with xgboost {saved or 'unknown'}, running {xgb.__version__}"
+
+
+def resolve_model_path(kind, models_dir='models', model_format='auto'):
+    """Path of the file load_model would use for ``kind``
+
+    ``model_format`` is 'auto' (native if present and saved by this
+    xgboost, else pickle), 'native' or 'pickle'.
+    """
+    entry = read_manifest(models_dir).get(kind, {})
+    if model_format in ('auto', 'native'):
+        mismatch = version_mismatch(entry)
+        for filename in [] if mismatch else entry.get('files', []):
+            path = os.path.join(models_dir, filename)
+            if os.path.exists(path):
+                return path
+        if model_format == 'native':
+            raise FileNotFoundError(
+                f'No native {kind} model usable: {mismatch}' if mismatch
+                else f'No native {kind} model listed in the manifest')
+    return os.path.join(models_dir, entry.get('pickle', LEGACY_PICKLES[kind]))
+
+
+def file_sha256(path):
+    """Content hash of a model file (its version)"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_pickled_booster(data):
+    """Unpickle a legacy model file; returns (booster, feature_names or None)"""
+    loaded_data = pickle.loads(data)
+
+    if isinstance(loaded_data, dict):
+        model = loaded_data.get('model')
+        features = loaded_data.get('feature_names')
+    else:
+        model = loaded_data
+        features = None
+
+    # ✅ SAFE: Wrap in try-catch to prevent crashes
+    try:
+        if hasattr(model, 'get_xgb_params'):
+            params = model.get_xgb_params()
+            # Remove GPU params if they exist
+            for key in ['gpu_id', 'tree_method', 'predictor']:
+                params.pop(key, None)
+            # Set CPU params
+            params['tree_method'] = 'hist'
+            params['predictor'] = 'cpu_predictor'
+            model.set_params(**params)
+    except Exception:
+        pass  # Silently ignore - model will work anyway
+
+    if hasattr(model, 'feature_names_in_'):
+        features = list(model.feature_names_in_)
+
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    return booster, features
+
+
+def read_booster(path, entry):
+    """(booster, feature_names or None, sha256) from a native or pickled file"""
+    # Read once: the same bytes are hashed (model version) and loaded
+    with open(path, 'rb') as f:
+        data = f.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    if path.endswith('.pkl'):
+        booster, features = load_pickled_booster(data)
+    else:
+        booster = xgb.Booster()
+        booster.load_model(bytearray(data))
+        features = entry.get('feature_names')
+    return booster, features, sha256
+
+
+def ensemble_matches(kind, ensemble, booster):
+    """Whether ``ensemble`` scores like ``booster`` (runs an XGBoost prediction)"""
+    try:
+        error = ensemble.check_against(booster)
+    except ValueError as e:
+        print(f"⚠️ {kind.title()} model not compiled, using XGBoost: {e}")
+        return False
+    if error > ENGINE_TOLERANCE:
+        print(f"⚠️ {kind.title()} compiled model differs from XGBoost "
+              f"(relative error {error:.1e}), using XGBoost")
+        return False
+    return True
+
+
+def compile_ensemble(kind, booster, check=True):
+    """NumPy TreeEnsemble for ``booster``, or None if unsupported or inexact
+
+    ``check=False`` leaves out the comparison with XGBoost, which runs a
+    prediction; LoadedModel then makes it before the ensemble's first use.
+    """
+    try:
+        ensemble = TreeEnsemble.from_booster(booster)
+    except ValueError as e:
+        print(f"⚠️ {kind.title()} model not compiled, using XGBoost: {e}")
+        return None
+    if check and not ensemble_matches(kind, ensemble, booster):
+        return None
+    return ensemble
+
+
+def load_model(kind, models_dir='models', model_format='auto', engine='xgboost',
+               check_engine=True):
+    """Load the 'day' or 'hour' model; returns None if it cannot be loaded
+
+    ``engine='numpy'`` additionally compiles the trees into a TreeEnsemble
+    used for scoring (falls back to XGBoost when that is not possible).
+    ``check_engine=False`` defers comparing it with XGBoost until
+    LoadedModel.check_ensemble or the first prediction.
+    """
+    start = time.perf_counter()
+    try:
+        entry = read_manifest(models_dir).get(kind, {})
+        mismatch = version_mismatch(entry)
+        if model_format == 'auto' and entry.get('files') and mismatch:
+            print(f"⚠️ Not loading the native {kind} model ({mismatch}), using the pickle")
+
+        path = resolve_model_path(kind, models_dir, model_format)
+        print(f"Loading {kind} model from: {path}")
+        try:
+            booster, features, sha256 = read_booster(path, entry)
+        except Exception as e:
+            if model_format != 'auto' or path.endswith('.pkl'):
+                raise
+            print(f"⚠️ Could not load {path} ({e}), falling back to the pickle")
+            path = resolve_model_path(kind, models_dir, 'pickle')
+            print(f"Loading {kind} model from: {path}")
+            booster, features, sha256 = read_booster(path, entry)
+
+        features = features or booster.feature_names or DEFAULT_FEATURES[kind]
+        ensemble = (compile_ensemble(kind, booster, check_engine)
+                    if engine == 'numpy' else None)
+        loaded = LoadedModel(
+            kind, booster, features, path, sha256, time.perf_counter() - start,
+            ensemble, check_engine)
+
+        print(f"✅ {kind.title()} model loaded successfully! "
+              f"({loaded.format} {loaded.version}, {loaded.engine}, "
+              f"{loaded.load_seconds * 1000:.0f} ms)")
+        print(f"📊 {kind.title()} Features: {loaded.features}")
+        return loaded
+
+    except Exception as e:
+        print(f"❌ Error loading {kind} model: {e}")
+        traceback.print_exc()
+        return None
@@ -0,0 +1,203 @@
+"""
+Versioned model registry with hot reload.
+
+Keeps the active 'day' and 'hour' models for this process. A reload loads
+the new booster next to the old one, warms it with a test prediction and
+only then swaps it in with a single reference assignment, so in-flight
+requests finish on the model they started with. Reloads are triggered
+explicitly (admin endpoint) or by a per-process file watcher.
+"""
+
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+
+import numpy as np
+
+from model_loader import MANIFEST_NAME, file_sha256, load_model, resolve_model_path
+
+MODEL_KINDS = ('day', 'hour')
+HISTORY_SIZE = 20
+
+
+class ModelRegistry:
+    """Active models plus the history of versions loaded by this process"""
+
+    def __init__(self, models_dir='models', model_format='auto',
+                 watch_interval=0, on_swap=None, engine='xgboost'):
+        self.models_dir = models_dir
+        self.model_format = model_format
+        self.engine = engine
+        self.watch_interval = watch_interval
+        self.on_swap = on_swap
+        self.history = []
+        self.last_error = None
+        self._active = {}
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._file_state = None
+
+    def get(self, kind):
+        """Active model for ``kind`` (loaded on first use; None if unavailable)"""
+        self._ensure_watcher()
+        if kind not in self._active:
+            self._load_missing(kind)
+        return self._active[kind]
+
+    def load_all(self, check_engine=True):
+        """Load every model now without starting the watcher thread
+
+        Used at import time and in a preloading gunicorn master, where no
+        background thread (or warm-up prediction) may run before the fork.
+        The master passes ``check_engine=False`` and each worker calls
+        check_engines after the fork.
+        """
+        for kind in MODEL_KINDS:
+            if kind not in self._active:
+                self._load_missing(kind, check_engine)
+
+    def check_engines(self):
+        """Compare compiled ensembles loaded unchecked with XGBoost"""
+        for model in self._active.values():
+            if model is not None:
+                model.check_ensemble()
+
+    def _load_missing(self, kind, check_engine=True):
+        with self._load_lock:
+            if kind not in self._active:
+                model = load_model(kind, self.models_dir, self.model_format, self.engine,
+                                   check_engine)
+                self._swap({kind: model})
+                self._file_state = self._read_file_state()
+
+    @property
+    def version(self):
+        """Combined version tag of the active models"""
+        return '+'.join(
+            f"{kind}:{model.version}" for kind, model in sorted(self._active.items())
+            if model is not None)
+
+    def _swap(self, updates):
+        active = dict(self._active)
+        active.update(updates)
+        self._active = active  # single assignment: readers see old or new
+
+        now = datetime.now().isoformat(timespec='seconds')
+        for kind, model in updates.items():
+            if model is not None:
+                self.history.append({
+                    'kind': kind,
+                    'version': model.version,
+                    'sha256': model.sha256,
+                    'path': model.path,
+                    'loaded_at': now
+                })
+        del self.history[:-HISTORY_SIZE]
+
+        if self.on_swap:
+            self.on_swap()
+
+    @staticmethod
+    def warm_up(model):
+        """Run a test prediction; raises if the model cannot score"""
+        prediction = model.predict(np.zeros((1, len(model.features)), dtype=np.float32))
+        if not np.all(np.isfinite(prediction)):
+            raise ValueError(f'{model.kind} model returned a non-finite warm-up prediction')
+
+    def reload(self, force=False):
+        """Load changed models, warm them up and swap them in atomically
+
+        A model is replaced only when its file's content hash differs from
+        the active version (or ``force`` is set). If any new model fails to
+        load or warm up, nothing is swapped. Returns a summary dict.
+        """
+        with self._load_lock:
+            candidates = {}
+            try:
+                for kind in MODEL_KINDS:
+                    current = self._active.get(kind)
+                    if not force and current is not None:
+                        path = resolve_model_path(kind, self.models_dir, self.model_format)
+                        if path == current.path and file_sha256(path) == current.sha256:
+                            continue
+                    model = load_model(kind, self.models_dir, self.model_format, self.engine)
+                    if model is None:
+                        raise RuntimeError(f'Could not load {kind} model')
+                    self.warm_up(model)
+                    candidates[kind] = model
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Model reload failed, keeping current models: {e}")
+                traceback.print_exc()
+                return {'reloaded': [], 'error': str(e), 'version': self.version}
+
+            if candidates:
+                self._swap(candidates)
+                print(f"🔄 Swapped in models: {self.version}")
+            self._file_state = self._read_file_state()
+            self.last_error = None
+            return {'reloaded': sorted(candidates), 'version': self.version}
+
+    # ------------------------------------------------------------------
+    # File watcher
+    # ------------------------------------------------------------------
+
+    def _read_file_state(self):
+        """(size, mtime) of the manifest and each model file that would load"""
+        paths = [os.path.join(self.models_dir, MANIFEST_NAME)]
+        for kind in MODEL_KINDS:
+            try:
+                paths.append(resolve_model_path(kind, self.models_dir, self.model_format))
+            except Exception:
+                pass
+        state = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                state.append((path, st.st_size, st.st_mtime_ns))
+            except OSError:
+                state.append((path, None, None))
+        return state
+
+    def _ensure_watcher(self):
+        # Threads do not survive a fork, so each worker starts its own
+        if not self.watch_interval or self._watcher_pid == os.getpid():
+            return
+        with self._load_lock:
+            if self._watcher_pid != os.getpid():
+                self._watcher_pid = os.getpid()
+                self._watcher = threading.Thread(
+                    target=self._watch, name='model-watcher', daemon=True)
+                self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.watch_interval)
+            try:
+                if self._file_state is not None and self._read_file_state() != self._file_state:
+                    print("🔄 Model files changed - reloading")
+                    self.reload()
+            except Exception:
+                traceback.print_exc()
+
+    def status(self):
+        active = self._active
+        return {
+            'version': self.version,
+            'active': {
+                kind: {
+                    'version': model.version,
+                    'format': model.format,
+                    'engine': model.engine,
+                    'path': model.path,
+                    'load_ms': round(model.load_seconds * 1000, 1)
+                } if model else None
+                for kind, model in active.items()
+            },
+            'history': list(self.history),
+            'last_error': self.last_error,
+            'watch_interval': self.watch_interval
+        }
@@ -0,0 +1,234 @@
+"""
+PDF text extraction for the upload endpoint.
+
+Runs inside the PDF worker processes (see pdf_jobs.py), so it only
+depends on the standard library and PyPDF2 - never on app.py.
+"""
+
+import io
+import re
+import signal
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+import PyPDF2
+
+
+class ExtractionTimeout(Exception):
+    """A PDF took longer than its time budget"""
+
+
+@contextmanager
+def deadline(seconds):
+    """Raise ExtractionTimeout in this (main) thread after ``seconds``
+
+    Uses SIGALRM, so it only applies on POSIX in a process's main thread,
+    which is where pool workers run their tasks. Elsewhere it is a no-op
+    and the caller's own timeout still applies.
+    """
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise ExtractionTimeout(f'PDF processing exceeded {seconds:g}s')
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_pdf(content, max_pages, timeout=None):
+    """Prediction inputs found in the first ``max_pages`` pages
+
+    Entry point for the worker processes. Pages are extracted and scanned
+    one at a time, and extraction stops as soon as every field has been
+    found. Returns the ``extracted_data`` and ``metadata`` parts of the
+    upload response.
+    """
+    with deadline(timeout):
+        reader = PyPDF2.PdfReader(io.BytesIO(content))
+        page_count = len(reader.pages)
+        extractor = PredictionExtractor()
+        pages_read = 0
+        for page in islice(reader.pages, max_pages):
+            pages_read += 1
+            if extractor.feed(page.extract_text() or ''):
+                break
+        extracted_data = extractor.result()
+
+    return {
+        'extracted_data': extracted_data,
+        'metadata': {
+            'confidence': extracted_data['confidence'],
+            'extracted_fields': extracted_data['extracted_fields'],
+            'page_count': page_count,
+            'pages_read': pages_read,
+            'truncated': not extractor.done and page_count > pages_read
+        }
+    }
+
+
+def _bounded(low, high):
+    """Converter for a matched number: int within [low, high], else None"""
+    def convert(value):
+        number = float(value)
+        return int(number) if low <= number <= high else None
+    return convert
+
+
+# Pattern rules per field, in priority order: (pattern, anchor, convert).
+# A pattern only runs when its literal anchor occurs in the text, which is
+# a fast substring scan; most rules are skipped on most pages that way.
+FIELD_RULES = {
+    'temperature': [
+        (r'temperature[:\s]*(\d+\.?\d*)\s*[°cC]', 'temperature', _bounded(-10, 50)),
+        (r'temp[:\s]*(\d+\.?\d*)\s*[°cC]', 'temp', _bounded(-10, 50)),
+        (r'(\d+\.?\d*)\s*[°cC]', None, _bounded(-10, 50)),
+        (r'(\d+\.?\d*)\s*celsius', 'celsius', _bounded(-10, 50)),
+    ],
+    'humidity': [
+        (r'humidity[:\s]*(\d+\.?\d*)\s*%', 'humidity', _bounded(0, 100)),
+        (r'relative\s*humidity[:\s]*(\d+)', 'humidity', _bounded(0, 100)),
+        (r'rh[:\s]*(\d+)\s*%', 'rh', _bounded(0, 100)),
+    ],
+    'windSpeed': [
+        (r'wind\s*speed[:\s]*(\d+\.?\d*)\s*(?:km/h|kmph|kph)', 'wind', _bounded(0, 200)),
+        (r'wind[:\s]*(\d+\.?\d*)\s*(?:km/h|kmph|kph)', 'wind', _bounded(0, 200)),
+    ],
+    'date': [
+        (r'date[:\s]*(\d{4}-\d{2}-\d{2})', 'date', str),
+    ],
+    'hour': [
+        (r'hour[:\s]*(\d{1,2})', 'hour', _bounded(0, 23)),
+    ],
+}
+COMPILED_RULES = {
+    field: [(re.compile(pattern), anchor, convert) for pattern, anchor, convert in rules]
+    for field, rules in FIELD_RULES.items()
+}
+
+# Keyword fields: value -> keywords, in priority order
+KEYWORD_FIELDS = {
+    'season': {
+        'spring': ('spring', 'march', 'april', 'may'),
+        'summer': ('summer', 'june', 'july', 'august'),
+        'fall': ('fall', 'autumn', 'september', 'october', 'november'),
+        'winter': ('winter', 'december', 'january', 'february')
+    },
+    'weather': {
+        'clear': ('clear', 'sunny', 'bright'),
+        'cloudy': ('cloudy', 'overcast', 'clouds'),
+        'rainy': ('rain', 'rainy', 'drizzle'),
+        'heavy_rain': ('heavy rain', 'thunderstorm', 'storm')
+    },
+    'isHoliday': {
+        True: ('holiday', 'festival')
+    }
+}
+
+# Confidence weight of each field, in extracted_fields order
+FIELD_WEIGHTS = {
+    'temperature': 1, 'humidity': 1, 'windSpeed': 1, 'date': 1, 'hour': 1,
+    'season': 0.5, 'weather': 1, 'isHoliday': 0.5
+}
+FIELD_LABELS = {'isHoliday': 'holiday'}
+
+DEFAULTS = {
+    'hour': 12,
+    'temperature': 25,
+    'humidity': 60,
+    'windSpeed': 15,
+    'season': 'summer',
+    'weather': 'clear',
+    'isHoliday': False
+}
+
+
+class PredictionExtractor:
+    """Finds the prediction inputs in a document fed one page at a time
+
+    Each field is taken from the first page that yields it; within a page
+    the rules apply in priority order. ``feed`` returns True once every
+    field has been found, after which later pages cannot change the result.
+    The tail of each page is carried into the next so that a label and its
+    value split by a page break are still matched.
+    """
+
+    CARRY = 100
+
+    def __init__(self):
+        self.found = {}
+        self._carry = ''
+
+    @property
+    def done(self):
+        return len(self.found) == len(FIELD_WEIGHTS)
+
+    def feed(self, text):
+        """Scan one page of text; returns True when every field is found"""
+        page = text.lower()
+        carried = len(self._carry)
+        text = self._carry + page
+        self._carry = text[-self.CARRY:] + '\n'
+        found = self.found
+
+        for field, rules in COMPILED_RULES.items():
+            if field in found:
+                continue
+            for pattern, anchor, convert in rules:
+                if anchor is not None and anchor not in text:
+                    continue
+                match = pattern.search(text)
+                # Matches within the carried tail were seen with the last page
+                while match and match.end() <= carried:
+                    match = pattern.search(text, match.start() + 1)
+                if match:
+                    value = convert(match.group(1))
+                    if value is not None:
+                        found[field] = value
+                        break
+
+        for field, choices in KEYWORD_FIELDS.items():
+            if field in found:
+                continue
+            for value, keywords in choices.items():
+                if any(keyword in page for keyword in keywords):
+                    found[field] = value
+                    break
+
+        return self.done
+
+    def result(self):
+        """extracted_data dict: found values over defaults, plus confidence"""
+        extracted_data = {'date': datetime.now().strftime('%Y-%m-%d'), **DEFAULTS}
+        extracted_fields = []
+        confidence_score = 0
+        for field, weight in FIELD_WEIGHTS.items():
+            if field in self.found:
+                extracted_data[field] = self.found[field]
+                extracted_fields.append(FIELD_LABELS.get(field, field))
+                confidence_score += weight
+
+        if confidence_score >= 5:
+            confidence = 'high'
+        elif confidence_score >= 3:
+            confidence = 'medium'
+        else:
+            confidence = 'low'
+
+        extracted_data['confidence'] = confidence
+        extracted_data['extracted_fields'] = extracted_fields
+        return extracted_data
+
+
+def parse_pdf_for_prediction(text):
+    """Extract prediction-related data from PDF text"""
+    extractor = PredictionExtractor()
+    extractor.feed(text)
+    return extractor.result()
@@ -0,0 +1,295 @@
+"""
+Background processing for PDF uploads.
+
+An upload becomes a row in the ``pdf_jobs`` table and a task for a small
+pool of worker processes, and the request returns the job id straight
+away. Job state lives in SQLite, so whichever gunicorn worker receives a
+status poll can answer it. Each job is capped in pages and bounded in
+time: the worker process interrupts itself after ``timeout`` seconds (and
+is killed if it still has not answered shortly after), and jobs that
+never report back are failed after ``stale_after``.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import uuid
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+
+from pdf_extraction import ExtractionTimeout
+
+PENDING = 'queued'
+DONE = 'done'
+FAILED = 'failed'
+
+# Seconds past a job's timeout before its worker process is killed
+KILL_GRACE = 5
+
+WORKER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+log = logging.getLogger(__name__)
+
+
+class WorkerCrashed(Exception):
+    """A PDF worker process died before answering"""
+
+
+class _Worker:
+    """One ``python -m pdf_worker`` process and the socket to it"""
+
+    def __init__(self):
+        parent, child = socket.socketpair()
+        with child:
+            self.process = subprocess.Popen(
+                [sys.executable, '-m', 'pdf_worker', str(child.fileno())],
+                pass_fds=(child.fileno(),), cwd=WORKER_DIR)
+        self.conn = Connection(parent.detach())
+
+    @property
+    def alive(self):
+        return not self.conn.closed and self.process.poll() is None
+
+    def run(self, content, max_pages, timeout):
+        """(result, seconds) for one job; raises what the job raised"""
+        try:
+            self.conn.send((content, max_pages, timeout))
+            if not self.conn.poll(None if timeout is None else timeout + KILL_GRACE):
+                self.close()
+                raise ExtractionTimeout(f'PDF processing exceeded {timeout:g}s')
+            reply = self.conn.recv()
+        except (EOFError, OSError):
+            self.close()
+            raise WorkerCrashed('PDF worker crashed') from None
+        if reply[0] == 'error':
+            raise reply[1]
+        return reply[1], reply[2]
+
+    def close(self):
+        self.conn.close()
+        self.process.kill()
+        self.process.wait()
+
+
+class WorkerPool:
+    """Runs extraction jobs on ``size`` pdf_worker processes
+
+    Each worker process is started by its own thread on that thread's
+    first job and replaced after it crashes or is killed. The processes
+    run pdf_worker.py as their main module: unlike a multiprocessing
+    pool, they never import the parent's main module (app.py under
+    ``python app.py``).
+    """
+
+    def __init__(self, size):
+        self._jobs = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._serve, name=f'pdf-worker-{i}', daemon=True)
+            for i in range(size)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, content, max_pages, timeout):
+        """Future of ``(result, seconds)`` for one PDF"""
+        future = Future()
+        self._jobs.put((future, content, max_pages, timeout))
+        return future
+
+    def _serve(self):
+        worker = None
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, content, max_pages, timeout = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if worker is None or not worker.alive:
+                    if worker is not None:
+                        worker.close()  # died while idle
+                    worker = _Worker()
+                future.set_result(worker.run(content, max_pages, timeout))
+            except Exception as e:
+                future.set_exception(e)
+        if worker is not None:
+            worker.close()
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+
+
+class PdfJobQueue:
+    """Process pool plus the shared job table"""
+
+    def __init__(self, connect, workers=2, max_pages=50, timeout=30,
+                 stale_after=600, retention_hours=24, observe=None):
+        self.connect = connect
+        self.observe = observe  # observe(stage, seconds) for parse timings
+        self.workers = workers
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.retention_hours = retention_hours
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def create_table(cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pdf_jobs (
+                id TEXT PRIMARY KEY,
+                user_email TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                filename TEXT,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_pdf_jobs_user_hash '
+            'ON pdf_jobs(user_email, file_hash)')
+
+    def _executor(self):
+        # Fresh processes, not forks: the web worker has threads and OpenMP
+        # state. Created per process, since threads do not survive a fork.
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = WorkerPool(self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def pending_job(self, user_email, file_hash):
+        """Id of this user's unfinished job for the same file, if any"""
+        conn = self.connect()
+        row = conn.execute(
+            'SELECT id FROM pdf_jobs WHERE user_email = ? AND file_hash = ? '
+            'AND status = ?', (user_email, file_hash, PENDING)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    @staticmethod
+    def _store(conn, user_email, filename, file_hash, result):
+        conn.execute(
+            'INSERT OR IGNORE INTO pdf_uploads '
+            '(user_email, file_hash, filename, extracted_data, metadata) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (user_email, file_hash, filename,
+             json.dumps(result['extracted_data']), json.dumps(result['metadata'])))
+
+    def cached_result(self, user_email, filename, file_hash):
+        """Reuse an earlier extraction of the same file, by any user
+
+        Looked up by content hash alone (idx_pdf_hash). On a hit the result
+        is recorded as this user's upload and returned; otherwise None.
+        """
+        conn = self.connect()
+        row = conn.execute(
+            'SELECT extracted_data, metadata FROM pdf_uploads '
+            'WHERE file_hash = ? AND metadata IS NOT NULL LIMIT 1',
+            (file_hash,)).fetchone()
+        if row is None:
+            conn.close()
+            return None
+
+        result = {'extracted_data': json.loads(row[0]), 'metadata': json.loads(row[1])}
+        result['metadata']['filename'] = filename
+        self._store(conn, user_email, filename, file_hash, result)
+        conn.commit()
+        conn.close()
+        return result
+
+    def submit(self, user_email, filename, file_hash, content):
+        """Queue a PDF for extraction; returns the job id"""
+        job_id = uuid.uuid4().hex
+        conn = self.connect()
+        conn.execute(
+            'INSERT INTO pdf_jobs (id, user_email, file_hash, filename, status) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (job_id, user_email, file_hash, filename, PENDING))
+        conn.execute(
+            "DELETE FROM pdf_jobs WHERE status != ? AND updated_at < datetime('now', ?)",
+            (PENDING, f'-{self.retention_hours} hours'))
+        conn.commit()
+        conn.close()
+
+        future = self._executor().submit(content, self.max_pages, self.timeout)
+        future.add_done_callback(
+            lambda f: self._finish(job_id, user_email, filename, file_hash, f))
+        return job_id
+
+    def _finish(self, job_id, user_email, filename, file_hash, future):
+        """Record a finished job (runs on the pool thread that ran it)"""
+        result, error = None, None
+        try:
+            result, seconds = future.result()
+            result['metadata']['filename'] = filename
+            if self.observe is not None:
+                self.observe('pdf_parse', seconds)
+        except ExtractionTimeout as e:
+            error = str(e)
+        except WorkerCrashed as e:
+            error = str(e)
+        except Exception as e:
+            error = f'Could not read PDF: {e}'
+
+        try:
+            conn = self.connect()
+            if result is not None:
+                self._store(conn, user_email, filename, file_hash, result)
+            conn.execute(
+                'UPDATE pdf_jobs SET status = ?, result = ?, error = ?, '
+                'updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                (FAILED if error else DONE,
+                 json.dumps(result) if result is not None else None, error, job_id))
+            conn.commit()
+            conn.close()
+        except Exception:
+            log.exception('Could not record PDF job %s', job_id)
+
+        if error:
+            log.warning('PDF job %s failed: %s', job_id, error)
+        else:
+            log.debug('PDF job %s done: %s', job_id, filename)
+
+    def status(self, job_id):
+        """Job dict (status plus result or error), or None if unknown"""
+        conn = self.connect()
+        row = conn.execute(
+            'SELECT status, result, error, filename, '
+            "(julianday('now') - julianday(created_at)) * 86400 "
+            'FROM pdf_jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            conn.close()
+            return None
+
+        status, result, error, filename, age = row
+        if status == PENDING and age > self.stale_after:
+            status, error = FAILED, 'PDF job did not finish'
+            conn.execute(
+                'UPDATE pdf_jobs SET status = ?, error = ?, '
+                'updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?',
+                (FAILED, error, job_id, PENDING))
+            conn.commit()
+        conn.close()
+
+        job = {'job_id': job_id, 'status': status, 'filename': filename}
+        if status == DONE:
+            job.update(json.loads(result))
+        elif status == FAILED:
+            job['error'] = error
+        return job
+
+    def shutdown(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown()
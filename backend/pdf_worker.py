@@ -0,0 +1,41 @@
+"""
+Entry module of the PDF worker processes.
+
+pdf_jobs.py starts every worker as ``python -m pdf_worker <fd>``, so a
+worker imports this module and pdf_extraction and nothing else. (A
+multiprocessing child re-imports its parent's main module, which under
+``python app.py`` is the whole app.) Jobs arrive over the socket ``fd``
+as ``(content, max_pages, timeout)`` and every job gets one reply:
+``('ok', result, seconds)`` or ``('error', exception)``.
+"""
+
+import sys
+import time
+from multiprocessing.connection import Connection
+
+from pdf_extraction import extract_pdf
+
+
+def serve(conn):
+    """Run jobs from ``conn`` until the parent closes it"""
+    while True:
+        try:
+            content, max_pages, timeout = conn.recv()
+        except EOFError:
+            return
+
+        start = time.perf_counter()
+        try:
+            result = extract_pdf(content, max_pages, timeout)
+        except Exception as e:
+            try:
+                conn.send(('error', e))
+            except Exception:
+                # Not picklable: send the message instead
+                conn.send(('error', RuntimeError(str(e))))
+        else:
+            conn.send(('ok', result, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    serve(Connection(int(sys.argv[1])))
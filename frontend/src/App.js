@@ -42,6 +42,7 @@ import SettingsPage from "./SettingsPage";
 import { useToast } from "./components/Toast";
 import LoadingSkeleton from "./components/LoadingSkeleton";
 import { ExportButton } from "./utils/exportCSV";
+import { uploadPdf } from "./utils/pdfUpload";
 
 // API Configuration
 const API_BASE_URL = "https://bikerental-ai.onrender.com";
@@ -987,6 +988,13 @@ function BookPage({ onBookingComplete, user }) {
         onBookingComplete(booking);
         setShowSuccessModal(true);
         setTimeout(() => setShowSuccessModal(false), 3000);
+      } else if (response.status === 409) {
+        // Fully booked: nothing was saved, and this is not a payment problem
+        setPaymentProcessing(false);
+        alert(
+          `${data.error || "No bike available for that time"}. ` +
+            "Please choose another time or bike type."
+        );
       } else {
         throw new Error("Booking failed");
       }
@@ -1495,17 +1503,13 @@ function PredictionPage({ user }) {
     setPdfUploaded(false);
 
     try {
-      const formData = new FormData();
-      formData.append("file", file);
-      formData.append("user_email", user?.email || "anonymous"); // ✅ ADD THIS LINE
       console.log(`📤 Uploading PDF: ${file.name}`);
 
-      const response = await fetch(`${API_BASE_URL}/api/upload-pdf`, {
-        method: "POST",
-        body: formData,
-      });
-
-      const data = await response.json();
+      const data = await uploadPdf(
+        API_BASE_URL,
+        file,
+        user?.email || "anonymous",
+      );
       console.log("📦 PDF Response:", data);
 
       if (data.success) {
@@ -3447,15 +3451,11 @@ function SmartChatBot({ onClose, setActiveTab, onBookingComplete, user }) {
     ]);
 
     try {
-      const formData = new FormData();
-      formData.append("file", file);
-      formData.append("user_email", user?.email || "anonymous");
-      const response = await fetch(`${API_BASE_URL}/api/upload-pdf`, {
-        method: "POST",
-        body: formData,
-      });
-
-      const data = await response.json();
+      const data = await uploadPdf(
+        API_BASE_URL,
+        file,
+        user?.email || "anonymous",
+      );
 
       if (data.success) {
         setMessages((prev) => [
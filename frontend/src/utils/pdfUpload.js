@@ -0,0 +1,31 @@
+const POLL_INTERVAL_MS = 1000;
+const POLL_TIMEOUT_MS = 120000;
+
+// Uploads a PDF and waits for the backend's extraction job to finish.
+// Resolves to { success, extracted_data, metadata } on success, or to
+// { success: false, error } (or the duplicate-upload response).
+export async function uploadPdf(apiBaseUrl, file, userEmail) {
+  const formData = new FormData();
+  formData.append("file", file);
+  formData.append("user_email", userEmail);
+
+  const response = await fetch(`${apiBaseUrl}/api/upload-pdf`, {
+    method: "POST",
+    body: formData,
+  });
+  let data = await response.json();
+  if (response.status !== 202 || !data.status_url) {
+    return data;
+  }
+
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    const poll = await fetch(`${apiBaseUrl}${data.status_url}`);
+    data = await poll.json();
+    if (poll.status !== 202) {
+      return data;
+    }
+  }
+  return { success: false, error: "PDF processing timed out" };
+}